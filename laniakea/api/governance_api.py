@@ -140,7 +140,7 @@ async def cast_vote(pid: int, req: VoteRequest) -> Dict[str, Any]:
         v = _dao().vote(pid, req.voter, req.choice)
     except Exception as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
-    return {"proposal_id": pid, "vote": v.__dict__}
+    return {"proposal_id": pid, "vote": v.to_dict()}
 
 
 @router.post("/proposals/{pid}/close")
@@ -261,6 +261,7 @@ async def gov_stats() -> Dict[str, Any]:
     d = _dao()
     return {
         "proposals": len(d.proposals),
+        "proposals_by_state": d.state_counts(),
         "delegations": len(d.delegations),
         "treasury": dict(d.treasury.balances),
         "parameters": d._parameters,
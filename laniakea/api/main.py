@@ -16,7 +16,7 @@ from typing import Any, Dict, List, Optional
 import os
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse, Response
 from pydantic import BaseModel
 
 # --- Core utilities ---------------------------------------------------------
@@ -44,6 +44,7 @@ from laniakea.governance.dao import DAO  # noqa: E402
 from laniakea.marketplace.nft import Marketplace  # noqa: E402
 from laniakea.simulation.cosmic import CosmicSimulator, CosmicEntity  # noqa: E402
 from laniakea.dashboard.metrics import ProtocolMetrics  # noqa: E402
+from laniakea.dashboard.live_dashboard import get_metrics_collector  # noqa: E402
 from laniakea.achievements.system import AchievementSystem  # noqa: E402
 from laniakea.ai.model import AIModel  # noqa: E402
 from laniakea.defi.swap import DecentralizedExchange, LiquidityPool  # noqa: E402
@@ -917,6 +918,24 @@ def get_metric_history(key: str) -> List[Dict[str, Any]]:
     return history
 
 
+@app.get("/dashboard/live/delta/{category}", tags=["Dashboard"])
+def get_live_metrics_delta(category: str, request: Request, since_ns: int = 0) -> Response:
+    """Columnar JSON of live metrics recorded after ``since_ns``, gzipped when accepted."""
+    collector = get_metrics_collector()
+    if category not in collector.metrics:
+        raise HTTPException(status_code=404, detail="Metric category not found.")
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(
+            content=collector.delta(category, since_ns),
+            media_type="application/json",
+            headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"},
+        )
+    return Response(
+        content=collector.delta(category, since_ns, compress=False),
+        media_type="application/json",
+    )
+
+
 # --- Achievements endpoints -------------------------------------------------
 @app.get("/achievements/all", tags=["Achievements"])
 def get_all_achievements() -> List[Dict[str, Any]]:
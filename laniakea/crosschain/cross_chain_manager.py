@@ -4,16 +4,20 @@ Manages interoperability between different blockchain networks
 """
 
 import asyncio
+import functools
 import logging
 import json
 import hashlib
+import itertools
 import time
-from typing import Dict, List, Any, Optional, Union, Tuple
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Union, Tuple, Set
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
 import aiohttp
-import ssl
+
+if TYPE_CHECKING:
+    import ssl
 
 # Web3 libraries
 try:
@@ -26,6 +30,34 @@ except ImportError:
     WEB3_AVAILABLE = False
     logging.warning("Web3 not available. Cross-chain features will be limited.")
 
+# Shared TLS context for outbound RPC connections, built on first use
+_SSL_CTX: Optional["ssl.SSLContext"] = None
+
+def _get_ssl_ctx() -> "ssl.SSLContext":
+    """Return the module-wide SSL context, creating it lazily"""
+    global _SSL_CTX
+    if _SSL_CTX is None:
+        import ssl
+        _SSL_CTX = ssl.create_default_context()
+    return _SSL_CTX
+
+# Upper bound for a single JSON-RPC round trip
+RPC_TIMEOUT_SECONDS = 10.0
+
+# Fast JSON codec for RPC payloads (orjson is optional)
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
+    _loads = json.loads
+
 class ChainType(Enum):
     """Supported blockchain types"""
     ETHEREUM = "ethereum"
@@ -92,8 +124,9 @@ class BridgeRequest:
     fee: Union[int, float] = 0
     error: Optional[str] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
+    tx_block_number: Optional[int] = None
 
-@dataclass
+@dataclass(slots=True)
 class CrossChainTransaction:
     """Represents a cross-chain transaction"""
     id: str
@@ -127,15 +160,30 @@ class CrossChainManager:
         # Bridge management
         self.bridge_requests: Dict[str, BridgeRequest] = {}
         self.transactions: Dict[str, CrossChainTransaction] = {}
-        self.bridge_queue = asyncio.Queue()
+        # Items are (priority, seq, bridge_id); PENDING work is served before CONFIRMING
+        self.bridge_queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._enqueued: Set[str] = set()
+        self._seq = itertools.count()
+        
+        # Confirming bridges indexed by source chain, and the last seen head per chain
+        self._confirming: Dict[ChainType, Dict[str, BridgeRequest]] = {}
+        self._chain_heads: Dict[ChainType, int] = {}
         
         # Liquidity pools
         self.liquidity_pools: Dict[Tuple[ChainType, ChainType, str], Dict] = {}
+        # Running sum of total_liquidity; pools are only added (in _get_pool), never resized
+        self._total_liquidity_sum = 0.0
+        
+        # Fee memoization, keyed by (from_chain, to_chain, asset_type, rounded_amount)
+        self._fee_cache = functools.lru_cache(maxsize=4096)(self._compute_bridge_fee)
         
         # Monitoring
         self.is_running = False
         self.monitor_task = None
         self.confirmation_watcher_task = None
+        self.progress_log_task = None
+        self._completed_since_log = 0
+        self._http_session: Optional[aiohttp.ClientSession] = None
         
         # Statistics
         self.stats = {
@@ -234,6 +282,7 @@ class CrossChainManager:
         # Start background tasks
         self.monitor_task = asyncio.create_task(self._monitor_bridges())
         self.confirmation_watcher_task = asyncio.create_task(self._watch_confirmations())
+        self.progress_log_task = asyncio.create_task(self._log_progress())
         
         self.logger.info("Cross-Chain Manager started")
 
@@ -247,6 +296,13 @@ class CrossChainManager:
         if self.confirmation_watcher_task:
             self.confirmation_watcher_task.cancel()
         
+        if self.progress_log_task:
+            self.progress_log_task.cancel()
+        
+        if self._http_session and not self._http_session.closed:
+            await self._http_session.close()
+        self._http_session = None
+        
         self.logger.info("Cross-Chain Manager stopped")
 
     async def _initialize_chain_connections(self):
@@ -255,7 +311,14 @@ class CrossChainManager:
             self.logger.warning("Web3 not available. Chain connections disabled.")
             return
         
-        for chain_type, config in self.chain_configs.items():
+        # Probe every endpoint concurrently over the shared async session instead of
+        # calling the blocking w3.is_connected() once per chain on the event loop
+        configs = list(self.chain_configs.items())
+        reachable = await asyncio.gather(*(self._probe_chain(config) for _, config in configs))
+        
+        for (chain_type, config), ok in zip(configs, reachable):
+            if not ok:
+                continue
             try:
                 # Connect to chain
                 w3 = Web3(Web3.HTTPProvider(config.rpc_url))
@@ -264,17 +327,31 @@ class CrossChainManager:
                 if chain_type in [ChainType.BSC, ChainType.POLYGON, ChainType.AVALANCHE, ChainType.ARBITRUM]:
                     w3.middleware_onion.inject(geth_poa_middleware, layer=0)
                 
-                # Test connection
-                if w3.is_connected():
-                    self.chain_connections[chain_type] = w3
-                    self.logger.info(f"Connected to {config.name}")
-                    self.stats["active_chains"] += 1
-                else:
-                    self.logger.error(f"Failed to connect to {config.name}")
+                self.chain_connections[chain_type] = w3
+                self.logger.info(f"Connected to {config.name}")
+                self.stats["active_chains"] += 1
                     
             except Exception as e:
                 self.logger.error(f"Error connecting to {config.name}: {str(e)}")
 
+    async def _probe_chain(self, config: ChainConfig) -> bool:
+        """Check that an RPC endpoint answers eth_chainId with the configured chain id"""
+        try:
+            reply = await self._post_rpc(
+                config.rpc_url,
+                {"jsonrpc": "2.0", "id": 1, "method": "eth_chainId", "params": []}
+            )
+            chain_id = int(reply["result"], 16)
+        except Exception as e:
+            self.logger.error(f"Failed to connect to {config.name}: {str(e)}")
+            return False
+        
+        if chain_id != config.chain_id:
+            self.logger.error(f"Chain id mismatch for {config.name}: expected "
+                              f"{config.chain_id}, got {chain_id}")
+            return False
+        return True
+
     async def create_bridge_request(self,
                                   from_chain: ChainType,
                                   to_chain: ChainType,
@@ -298,7 +375,7 @@ class CrossChainManager:
         bridge_id = self._generate_bridge_id()
         
         # Calculate fee
-        fee = await self._calculate_bridge_fee(from_chain, to_chain, amount, asset_type)
+        fee = self._calculate_bridge_fee(from_chain, to_chain, amount, asset_type)
         
         # Create bridge request
         bridge_request = BridgeRequest(
@@ -321,11 +398,21 @@ class CrossChainManager:
         self.stats["total_volume"] += float(amount)
         
         # Add to queue
-        await self.bridge_queue.put(bridge_id)
+        await self._enqueue_bridge(bridge_request)
         
-        self.logger.info(f"Created bridge request: {bridge_id} ({from_chain.value} -> {to_chain.value})")
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("Created bridge request: %s (%s -> %s)",
+                             bridge_id, from_chain.value, to_chain.value)
         return bridge_id
 
+    async def _enqueue_bridge(self, bridge: BridgeRequest):
+        """Queue a bridge for processing, ignoring bridges already queued"""
+        if bridge.id in self._enqueued:
+            return
+        self._enqueued.add(bridge.id)
+        priority = 0 if bridge.status == BridgeStatus.PENDING else 1
+        await self.bridge_queue.put((priority, next(self._seq), bridge.id))
+
     async def get_bridge_status(self, bridge_id: str) -> Optional[Dict[str, Any]]:
         """Get status of a bridge request"""
         if bridge_id not in self.bridge_requests:
@@ -352,6 +439,32 @@ class CrossChainManager:
             "metadata": bridge.metadata
         }
 
+    async def get_bridge_status_json(self, bridge_id: str) -> Optional[bytes]:
+        """Get status of a bridge request as an encoded JSON payload"""
+        status = await self.get_bridge_status(bridge_id)
+        if status is None:
+            return None
+        return _dumps(status)
+
+    def _get_http_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session used for RPC calls"""
+        if self._http_session is None or self._http_session.closed:
+            connector = aiohttp.TCPConnector(ssl=_get_ssl_ctx())
+            self._http_session = aiohttp.ClientSession(
+                connector=connector, timeout=aiohttp.ClientTimeout(total=RPC_TIMEOUT_SECONDS)
+            )
+        return self._http_session
+
+    async def _post_rpc(self, url: str,
+                        payload: Union[Dict[str, Any], List[Dict[str, Any]]]) -> Any:
+        """POST a (possibly batched) JSON-RPC payload and decode the response"""
+        async with self._get_http_session().post(
+            url,
+            data=_dumps(payload),
+            headers={"Content-Type": "application/json"}
+        ) as response:
+            return _loads(await response.read())
+
     async def get_supported_chains(self) -> List[Dict[str, Any]]:
         """Get list of supported blockchain networks"""
         chains = []
@@ -367,9 +480,9 @@ class CrossChainManager:
             })
         return chains
 
-    async def get_liquidity_info(self, from_chain: ChainType, to_chain: ChainType, 
-                               token_address: Optional[str] = None) -> Dict[str, Any]:
-        """Get liquidity information for a bridge pair"""
+    def _get_pool(self, from_chain: ChainType, to_chain: ChainType,
+                  token_address: Optional[str] = None) -> Dict[str, Any]:
+        """Get (or lazily create) the liquidity pool for a bridge pair"""
         pool_key = (from_chain, to_chain, token_address or "native")
         
         if pool_key not in self.liquidity_pools:
@@ -383,8 +496,22 @@ class CrossChainManager:
                 "min_amount": 0.01,
                 "max_amount": 100000.0
             }
+            self._total_liquidity_sum += 1000000.0
         
-        pool = self.liquidity_pools[pool_key]
+        return self.liquidity_pools[pool_key]
+
+    def set_pool_fee_rate(self, from_chain: ChainType, to_chain: ChainType,
+                          fee_rate: float, token_address: Optional[str] = None):
+        """Update the fee rate of a liquidity pool"""
+        pool = self._get_pool(from_chain, to_chain, token_address)
+        if pool["fee_rate"] != fee_rate:
+            pool["fee_rate"] = fee_rate
+            self._fee_cache.cache_clear()
+
+    async def get_liquidity_info(self, from_chain: ChainType, to_chain: ChainType, 
+                               token_address: Optional[str] = None) -> Dict[str, Any]:
+        """Get liquidity information for a bridge pair"""
+        pool = self._get_pool(from_chain, to_chain, token_address)
         
         return {
             "from_chain": from_chain.value,
@@ -405,17 +532,20 @@ class CrossChainManager:
             try:
                 # Get bridge from queue
                 try:
-                    bridge_id = await asyncio.wait_for(self.bridge_queue.get(), timeout=1.0)
+                    _, _, bridge_id = await asyncio.wait_for(self.bridge_queue.get(), timeout=1.0)
                 except asyncio.TimeoutError:
                     continue
                 
-                bridge = self.bridge_requests[bridge_id]
-                
-                # Process bridge based on status
-                if bridge.status == BridgeStatus.PENDING:
-                    await self._process_bridge_request(bridge)
-                elif bridge.status == BridgeStatus.CONFIRMING:
-                    await self._confirm_bridge(bridge)
+                try:
+                    bridge = self.bridge_requests[bridge_id]
+                    
+                    # Process bridge based on status
+                    if bridge.status == BridgeStatus.PENDING:
+                        await self._process_bridge_request(bridge)
+                    elif bridge.status == BridgeStatus.CONFIRMING:
+                        await self._confirm_bridge(bridge)
+                finally:
+                    self._enqueued.discard(bridge_id)
                 
             except Exception as e:
                 self.logger.error(f"Error in bridge monitoring: {str(e)}")
@@ -424,10 +554,13 @@ class CrossChainManager:
     async def _process_bridge_request(self, bridge: BridgeRequest):
         """Process a pending bridge request"""
         try:
-            self.logger.info(f"Processing bridge request: {bridge.id}")
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info("Processing bridge request: %s", bridge.id)
             
             # Update status
             bridge.status = BridgeStatus.CONFIRMING
+            bridge.tx_block_number = self._chain_heads.get(bridge.from_chain, 0)
+            self._confirming.setdefault(bridge.from_chain, {})[bridge.id] = bridge
             
             # For demonstration, simulate transaction creation
             # In real implementation, this would interact with the actual blockchain
@@ -447,13 +580,14 @@ class CrossChainManager:
             
             self.transactions[tx.id] = tx
             
-            self.logger.info(f"Bridge transaction created: {tx_hash}")
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info("Bridge transaction created: %s", tx_hash)
             
         except Exception as e:
             bridge.status = BridgeStatus.FAILED
             bridge.error = str(e)
             self.stats["failed_bridges"] += 1
-            self.logger.error(f"Failed to process bridge {bridge.id}: {str(e)}")
+            self.logger.error("Failed to process bridge %s: %s", bridge.id, e)
 
     async def _confirm_bridge(self, bridge: BridgeRequest):
         """Confirm a bridge transaction"""
@@ -465,6 +599,7 @@ class CrossChainManager:
             
             if bridge.confirmations >= bridge.required_confirmations:
                 # Complete the bridge
+                self._confirming.get(bridge.from_chain, {}).pop(bridge.id, None)
                 bridge.status = BridgeStatus.COMPLETED
                 bridge.bridge_tx_hash = self._generate_transaction_hash()
                 
@@ -478,22 +613,56 @@ class CrossChainManager:
                     self.stats["completed_bridges"]
                 )
                 
-                self.logger.info(f"Bridge completed: {bridge.id}")
+                self._completed_since_log += 1
                 
         except Exception as e:
+            self._confirming.get(bridge.from_chain, {}).pop(bridge.id, None)
             bridge.status = BridgeStatus.FAILED
             bridge.error = str(e)
             self.stats["failed_bridges"] += 1
-            self.logger.error(f"Failed to confirm bridge {bridge.id}: {str(e)}")
+            self.logger.error("Failed to confirm bridge %s: %s", bridge.id, e)
+
+    def _apply_new_head(self, chain: ChainType, height: int) -> None:
+        """Apply a new block height to every confirming bridge on a chain in one pass"""
+        self._chain_heads[chain] = height
+        confirming = self._confirming.get(chain)
+        if not confirming:
+            return
+        
+        now = datetime.utcnow()
+        completed = []
+        total_elapsed = 0.0
+        for bridge in confirming.values():
+            bridge.confirmations = height - bridge.tx_block_number
+            if bridge.confirmations >= bridge.required_confirmations:
+                bridge.status = BridgeStatus.COMPLETED
+                bridge.bridge_tx_hash = self._generate_transaction_hash()
+                total_elapsed += (now - bridge.created_at).total_seconds()
+                completed.append(bridge.id)
+        
+        if not completed:
+            return
+        
+        for bridge_id in completed:
+            del confirming[bridge_id]
+        
+        # Single statistics update for the whole batch
+        prev_completed = self.stats["completed_bridges"]
+        new_completed = prev_completed + len(completed)
+        self.stats["completed_bridges"] = new_completed
+        self.stats["average_bridge_time"] = (
+            (self.stats["average_bridge_time"] * prev_completed + total_elapsed) / new_completed
+        )
+        self._completed_since_log += len(completed)
 
     async def _watch_confirmations(self):
         """Watch for transaction confirmations"""
         while self.is_running:
             try:
-                # Check all pending bridges
-                for bridge in self.bridge_requests.values():
-                    if bridge.status == BridgeStatus.CONFIRMING:
-                        await self._confirm_bridge(bridge)
+                # Simulate one new block per chain and confirm in batches
+                # In real implementation, heads would come from chain subscriptions
+                for chain in list(self._confirming):
+                    self._apply_new_head(chain, self._chain_heads.get(chain, 0) + 1)
                 
                 await asyncio.sleep(30)  # Check every 30 seconds
                 
@@ -501,6 +670,14 @@ class CrossChainManager:
                 self.logger.error(f"Error in confirmation watcher: {str(e)}")
                 await asyncio.sleep(10)
 
+    async def _log_progress(self):
+        """Emit a single completion summary per second instead of one line per bridge"""
+        while self.is_running:
+            await asyncio.sleep(1)
+            if self._completed_since_log:
+                completed, self._completed_since_log = self._completed_since_log, 0
+                self.logger.info("Bridges completed in the last second: %d", completed)
+
     async def _validate_bridge_request(self, from_chain: ChainType, to_chain: ChainType,
                                      asset_type: AssetType, amount: Union[int, float],
                                      recipient_address: str, sender_address: str,
@@ -543,15 +720,20 @@ class CrossChainManager:
         
         return ValidationResult(True, None)
 
-    async def _calculate_bridge_fee(self, from_chain: ChainType, to_chain: ChainType,
-                                  amount: Union[int, float], asset_type: AssetType) -> Union[int, float]:
-        """Calculate bridge fee"""
+    def _calculate_bridge_fee(self, from_chain: ChainType, to_chain: ChainType,
+                              amount: Union[int, float], asset_type: AssetType) -> Union[int, float]:
+        """Calculate bridge fee (memoized per amount bucket)"""
+        return self._fee_cache(from_chain, to_chain, asset_type, round(amount, 4))
+
+    def _compute_bridge_fee(self, from_chain: ChainType, to_chain: ChainType,
+                            asset_type: AssetType, amount: Union[int, float]) -> Union[int, float]:
+        """Compute bridge fee from the pool fee rate and network gas estimate"""
         
-        # Get liquidity info
-        liquidity_info = await self.get_liquidity_info(from_chain, to_chain)
+        # Get liquidity pool
+        pool = self._get_pool(from_chain, to_chain)
         
         # Calculate base fee
-        base_fee = amount * liquidity_info["fee_rate"]
+        base_fee = amount * pool["fee_rate"]
         
         # Add network fee
         from_config = self.chain_configs[from_chain]
@@ -584,8 +766,7 @@ class CrossChainManager:
                                   if b.status == BridgeStatus.PENDING]),
             "confirming_bridges": len([b for b in self.bridge_requests.values() 
                                     if b.status == BridgeStatus.CONFIRMING]),
-            "total_liquidity": sum(pool["total_liquidity"] 
-                                 for pool in self.liquidity_pools.values()),
+            "total_liquidity": self._total_liquidity_sum,
             "average_fee": self.stats["total_volume"] * 0.001 if self.stats["total_volume"] > 0 else 0
         }
 
@@ -14,17 +14,50 @@ Laniakea Protocol - Advanced Interactive Dashboard
 """
 
 import asyncio
+import concurrent.futures
+import itertools
 import json
+import os
+import threading
 import time
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, NamedTuple, Optional
 from datetime import datetime, timedelta
-from collections import deque, defaultdict
-from dataclasses import dataclass, asdict
+from collections import Counter, deque
+import numpy as np
 import psutil  # برای مانیتورینگ سیستم
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
 
-@dataclass
-class SystemMetrics:
+
+# اختلاف ساعت دیواری و monotonic برای تبدیل timestamp های monotonic به زمان دیواری
+_WALL_OFFSET_NS = time.time_ns() - time.monotonic_ns()
+
+
+# psutil.cpu_percent(interval=None) نسبت به فراخوانی قبلی (سراسری) محاسبه می‌شود؛
+# قفل تضمین می‌کند prime و نمونه‌برداری از thread های مختلف تداخل نکنند
+_CPU_LOCK = threading.Lock()
+
+
+def _read_cpu_percent() -> float:
+    """درصد CPU از آخرین فراخوانی (non-blocking)"""
+    with _CPU_LOCK:
+        return psutil.cpu_percent(interval=None)
+
+
+def _wall_seconds(monotonic_ns: int) -> float:
+    """تبدیل timestamp از نوع monotonic_ns به ثانیه epoch (معادل time.time())"""
+    return (monotonic_ns + _WALL_OFFSET_NS) / 1e9
+
+
+def _format_ns(monotonic_ns: int) -> str:
+    """تبدیل timestamp از نوع monotonic_ns به رشته ISO"""
+    return datetime.fromtimestamp(_wall_seconds(monotonic_ns)).isoformat()
+
+
+class SystemMetrics(NamedTuple):
     """معیارهای سیستم"""
 
     timestamp: float
@@ -36,8 +69,7 @@ class SystemMetrics:
     active_connections: int
 
 
-@dataclass
-class BlockchainMetrics:
+class BlockchainMetrics(NamedTuple):
     """معیارهای بلاکچین"""
 
     timestamp: float
@@ -49,8 +81,7 @@ class BlockchainMetrics:
     active_nodes: int
 
 
-@dataclass
-class AIMetrics:
+class AIMetrics(NamedTuple):
     """معیارهای هوش مصنوعی"""
 
     timestamp: float
@@ -62,6 +93,96 @@ class AIMetrics:
     last_evolution: Optional[str]
 
 
+class DashboardEvent:
+    """رویداد داشبورد با schema ثابت"""
+
+    __slots__ = ("timestamp_ns", "type", "message", "extra")
+
+    def __init__(
+        self, timestamp_ns: int, type: str, message: str, extra: Optional[Dict[str, Any]] = None
+    ):
+        self.timestamp_ns = timestamp_ns
+        self.type = type
+        self.message = message
+        self.extra = extra
+
+    def to_dict(self) -> Dict[str, Any]:
+        """تبدیل به dict (فقط هنگام خواندن)"""
+        return {
+            "timestamp_ns": self.timestamp_ns,
+            "timestamp": _wall_seconds(self.timestamp_ns),
+            "datetime": _format_ns(self.timestamp_ns),
+            "type": self.type,
+            "message": self.message,
+            **(self.extra or {}),
+        }
+
+
+class MetricRingBuffer:
+    """
+    بافر حلقوی struct-of-arrays برای یک نوع معیار
+
+    هر فیلد یک آرایه NumPy از پیش تخصیص‌یافته است؛ append بدون تخصیص حافظه
+    و در O(1) انجام می‌شود.
+    """
+
+    _DTYPES = {float: np.float64, int: np.int64}
+
+    def __init__(self, row_type: type, capacity: int):
+        self.row_type = row_type
+        self.capacity = capacity
+        self.field_names = list(row_type._fields)
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.empty(capacity, dtype=self._DTYPES.get(tp, object))
+            for name, tp in row_type.__annotations__.items()
+        }
+        self._column_list = [self.columns[name] for name in self.field_names]
+        self.head = 0
+
+    def __len__(self) -> int:
+        return min(self.head, self.capacity)
+
+    def append(self, row: Any):
+        """افزودن یک ردیف"""
+        idx = self.head % self.capacity
+        for column, value in zip(self._column_list, row):
+            column[idx] = value
+        self.head += 1
+
+    def latest(self) -> Optional[Any]:
+        """آخرین ردیف ثبت‌شده"""
+        if not self.head:
+            return None
+        idx = (self.head - 1) % self.capacity
+        return self.row_type._make(
+            column[idx : idx + 1].tolist()[0] for column in self._column_list
+        )
+
+    def column(self, name: str) -> np.ndarray:
+        """یک ستون به ترتیب زمانی"""
+        arr = self.columns[name]
+        if self.head <= self.capacity:
+            return arr[: self.head]
+        split = self.head % self.capacity
+        return np.concatenate((arr[split:], arr[:split]))
+
+    def to_columns(self) -> Dict[str, np.ndarray]:
+        """کپی ستون‌ها به ترتیب زمانی (برای serialize مستقیم آرایه‌ها)"""
+        return {name: self.column(name).copy() for name in self.field_names}
+
+    def records(self, mask: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """ردیف‌ها به صورت dict (اختیاری: فیلتر با mask بولی)"""
+        cols = [self.column(name) for name in self.field_names]
+        if mask is not None:
+            cols = [col[mask] for col in cols]
+        lists = [col.tolist() for col in cols]
+        return [dict(zip(self.field_names, values)) for values in zip(*lists)]
+
+    def since(self, cutoff: float) -> List[Dict[str, Any]]:
+        """ردیف‌های با timestamp >= cutoff"""
+        return self.records(self.column("timestamp") >= cutoff)
+
+
 class AdvancedDashboard:
     """
     داشبورد تعاملی پیشرفته
@@ -70,21 +191,57 @@ class AdvancedDashboard:
     جمع‌آوری و نمایش می‌دهد.
     """
 
-    def __init__(self, history_size: int = 1000, update_interval: float = 1.0):
+    def __init__(
+        self,
+        history_size: int = 1000,
+        update_interval: float = 1.0,
+        track_connections: bool = False,
+        alert_cooldown: float = 30.0,
+        enable_blockchain_poll: bool = False,
+        enable_ai_poll: bool = False,
+    ):
         """
         راه‌اندازی dashboard
 
         Args:
             history_size: تعداد نقاط داده برای نگهداری
             update_interval: فاصله به‌روزرسانی (ثانیه)
+            track_connections: شمارش اتصالات شبکه (پرهزینه)
+            alert_cooldown: حداقل فاصله بین دو alert هم‌نوع (ثانیه)
+            enable_blockchain_poll: تولید داده نمونه بلاکچین در هر تیک
+            enable_ai_poll: تولید داده نمونه هوش مصنوعی در هر تیک
         """
         self.history_size = history_size
         self.update_interval = update_interval
+        self.track_connections = track_connections
+
+        # داده‌های بلاکچین و AI فعلاً نمونه هستند؛ تولیدکننده‌ها با
+        # record_blockchain / record_ai داده را push می‌کنند
+        self.enable_blockchain_poll = enable_blockchain_poll
+        self.enable_ai_poll = enable_ai_poll
+
+        # آخرین snapshot سیستم (monotonic timestamp, SystemMetrics)
+        self._last_snapshot: Optional[SystemMetrics] = None
+        self._last_snapshot_at = 0.0
+
+        # handle های psutil یک بار ساخته و در هر تیک استفاده می‌شوند
+        self._proc = psutil.Process()
+        self._disk_path = "/"
+
+        # شمارش اتصالات: روی لینوکس /proc/net/sockstat، در غیر این صورت psutil هر N تیک
+        self._sockstat_fd: Optional[int] = None
+        self._conn_poll_every = 10
+        self._conn_tick = 0
+        self._last_conn_count = 0
+
+        # thread اختصاصی برای فراخوانی‌های blocking تا حلقه asyncio مسدود نشود
+        # (lazy ساخته و در stop() بسته می‌شود)
+        self._exec: Optional[concurrent.futures.ThreadPoolExecutor] = None
 
         # تاریخچه معیارها
-        self.system_history: deque = deque(maxlen=history_size)
-        self.blockchain_history: deque = deque(maxlen=history_size)
-        self.ai_history: deque = deque(maxlen=history_size)
+        self.system_history = MetricRingBuffer(SystemMetrics, history_size)
+        self.blockchain_history = MetricRingBuffer(BlockchainMetrics, history_size)
+        self.ai_history = MetricRingBuffer(AIMetrics, history_size)
 
         # آمار کلی
         self.stats = {
@@ -97,12 +254,20 @@ class AdvancedDashboard:
 
         # وضعیت نودها
         self.nodes: Dict[str, Dict] = {}
+        self._node_active = 0
+        self._node_inactive = 0
 
         # رویدادهای اخیر
         self.recent_events: deque = deque(maxlen=100)
 
         # Alert ها
-        self.alerts: List[Dict] = []
+        self.alerts: deque = deque(maxlen=1024)
+        self._alert_id_counter = itertools.count(1)
+        self._alert_by_id: Dict[int, Dict] = {}
+        self._open_alert_types: set = set()
+        self._alert_sev_open: Counter = Counter()
+        self.alert_cooldown = alert_cooldown
+        self._last_alert: Dict[tuple, float] = {}
 
         # وضعیت
         self.is_running = False
@@ -114,6 +279,10 @@ class AdvancedDashboard:
             return
 
         self.is_running = True
+
+        # مقداردهی اولیه شمارنده CPU تا فراخوانی‌های بعدی non-blocking باشند
+        _read_cpu_percent()
+
         self._monitor_task = asyncio.create_task(self._monitor_loop())
         print("✅ Dashboard شروع به کار کرد")
 
@@ -128,16 +297,33 @@ class AdvancedDashboard:
             except asyncio.CancelledError:
                 pass
 
+        if self._exec is not None:
+            # snapshot در حال اجرا ممکن است هنوز از _sockstat_fd بخواند؛ پیش از بستن fd
+            # منتظر پایانش می‌مانیم (بیرون از event loop)
+            executor, self._exec = self._exec, None
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+        if self._sockstat_fd is not None:
+            if self._sockstat_fd >= 0:
+                os.close(self._sockstat_fd)
+            self._sockstat_fd = None
+
         print("⏹️ Dashboard متوقف شد")
 
     async def _monitor_loop(self):
-        """حلقه اصلی مانیتورینگ"""
+        """حلقه اصلی مانیتورینگ (زمان‌بندی با deadline مطلق تا تاخیرها انباشته نشوند)"""
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        tick = 0
+
         while self.is_running:
             try:
                 # جمع‌آوری معیارها
                 await self._collect_system_metrics()
-                await self._collect_blockchain_metrics()
-                await self._collect_ai_metrics()
+                if self.enable_blockchain_poll:
+                    await self._collect_blockchain_metrics()
+                if self.enable_ai_poll:
+                    await self._collect_ai_metrics()
 
                 # بررسی alert ها
                 await self._check_alerts()
@@ -145,49 +331,101 @@ class AdvancedDashboard:
                 # به‌روزرسانی آمار
                 self._update_stats()
 
-                await asyncio.sleep(self.update_interval)
+                tick += 1
+                sleep_for = t0 + tick * self.update_interval - loop.time()
+                if sleep_for > 0:
+                    await asyncio.sleep(sleep_for)
+                else:
+                    # تیک‌های از دست رفته را جبران نمی‌کنیم؛ از زمان فعلی ادامه می‌دهیم
+                    t0, tick = loop.time(), 0
+                    await asyncio.sleep(0)
 
             except Exception as e:
                 print(f"❌ خطا در monitor loop: {e}")
                 await asyncio.sleep(5)
+                t0, tick = loop.time(), 0
 
-    async def _collect_system_metrics(self):
-        """جمع‌آوری معیارهای سیستم"""
-        try:
-            # CPU
-            cpu_percent = psutil.cpu_percent(interval=0.1)
+    def _snapshot(self) -> SystemMetrics:
+        """خواندن پشت‌سرهم معیارهای سیستم (blocking، در executor اجرا می‌شود)"""
+        now = time.monotonic()
+        if (
+            self._last_snapshot is not None
+            and now - self._last_snapshot_at < self.update_interval / 2
+        ):
+            return self._last_snapshot
+
+        with self._proc.oneshot():
+            # CPU (non-blocking، نسبت به فراخوانی قبلی)
+            cpu_percent = _read_cpu_percent()
 
             # Memory
-            memory = psutil.virtual_memory()
-            memory_percent = memory.percent
+            memory_percent = psutil.virtual_memory().percent
 
             # Disk
-            disk = psutil.disk_usage("/")
-            disk_percent = disk.percent
+            disk_percent = psutil.disk_usage(self._disk_path).percent
 
             # Network
             net_io = psutil.net_io_counters()
-            network_sent = net_io.bytes_sent
-            network_recv = net_io.bytes_recv
 
             # Connections
-            connections = len(psutil.net_connections())
+            connections = self._fast_conn_count()
+
+        snapshot = SystemMetrics(
+            timestamp=time.time(),
+            cpu_percent=cpu_percent,
+            memory_percent=memory_percent,
+            disk_percent=disk_percent,
+            network_sent=net_io.bytes_sent,
+            network_recv=net_io.bytes_recv,
+            active_connections=connections,
+        )
+
+        self._last_snapshot = snapshot
+        self._last_snapshot_at = now
+        return snapshot
+
+    def _fast_conn_count(self) -> int:
+        """تعداد اتصالات TCP فعال بدون پیمایش همه fd ها"""
+        if self._sockstat_fd is None:
+            try:
+                self._sockstat_fd = os.open("/proc/net/sockstat", os.O_RDONLY)
+            except OSError:
+                self._sockstat_fd = -1
 
-            metrics = SystemMetrics(
-                timestamp=time.time(),
-                cpu_percent=cpu_percent,
-                memory_percent=memory_percent,
-                disk_percent=disk_percent,
-                network_sent=network_sent,
-                network_recv=network_recv,
-                active_connections=connections,
-            )
+        # کپی محلی: stop() ممکن است هم‌زمان fd را ببندد و None کند
+        fd = self._sockstat_fd
+        if fd is not None and fd >= 0:
+            try:
+                data = os.pread(fd, 512, 0)
+                # خط دوم: "TCP: inuse N orphan ..."
+                tcp_line = data.split(b"\n", 2)[1]
+                return int(tcp_line.split(b"inuse", 1)[1].split()[0])
+            except (OSError, IndexError, ValueError):
+                pass
+
+        # غیر لینوکس: net_connections پرهزینه‌ترین فراخوانی psutil است
+        if not self.track_connections:
+            return 0
+        if self._conn_tick % self._conn_poll_every == 0:
+            self._last_conn_count = len(psutil.net_connections(kind="tcp"))
+        self._conn_tick += 1
+        return self._last_conn_count
+
+    async def _collect_system_metrics(self):
+        """جمع‌آوری معیارهای سیستم"""
+        try:
+            loop = asyncio.get_running_loop()
+            if self._exec is None:
+                self._exec = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="dash-metrics"
+                )
+            metrics = await loop.run_in_executor(self._exec, self._snapshot)
 
             self.system_history.append(metrics)
 
             # به‌روزرسانی peak values
-            self.stats["peak_cpu"] = max(self.stats["peak_cpu"], cpu_percent)
-            self.stats["peak_memory"] = max(self.stats["peak_memory"], memory_percent)
+            self.stats["peak_cpu"] = max(self.stats["peak_cpu"], metrics.cpu_percent)
+            self.stats["peak_memory"] = max(self.stats["peak_memory"], metrics.memory_percent)
 
         except Exception as e:
             print(f"❌ خطا در جمع‌آوری system metrics: {e}")
@@ -231,12 +469,23 @@ class AdvancedDashboard:
         except Exception as e:
             print(f"❌ خطا در جمع‌آوری AI metrics: {e}")
 
+    def record_blockchain(self, **kwargs):
+        """ثبت معیارهای بلاکچین توسط تولیدکننده (push)"""
+        kwargs.setdefault("timestamp", time.time())
+        kwargs.setdefault("active_nodes", len(self.nodes))
+        self.blockchain_history.append(BlockchainMetrics(**kwargs))
+
+    def record_ai(self, **kwargs):
+        """ثبت معیارهای هوش مصنوعی توسط تولیدکننده (push)"""
+        kwargs.setdefault("timestamp", time.time())
+        kwargs.setdefault("last_evolution", None)
+        self.ai_history.append(AIMetrics(**kwargs))
+
     async def _check_alerts(self):
         """بررسی و ایجاد alert ها"""
         # بررسی CPU
-        if self.system_history:
-            latest = self.system_history[-1]
-
+        latest = self.system_history.latest()
+        if latest is not None:
             if latest.cpu_percent > 90:
                 self._add_alert("HIGH_CPU", f"CPU usage: {latest.cpu_percent}%", "warning")
 
@@ -248,19 +497,58 @@ class AdvancedDashboard:
 
     def _add_alert(self, alert_type: str, message: str, severity: str = "info"):
         """افزودن alert"""
+        # جلوگیری از alert های تکراری
+        if alert_type in self._open_alert_types:
+            return
+
+        # cooldown برای هر (نوع، شدت) تا alert ها پشت سر هم تکرار نشوند
+        key = (alert_type, severity)
+        now = time.monotonic()
+        if now - self._last_alert.get(key, float("-inf")) < self.alert_cooldown:
+            return
+        self._last_alert[key] = now
+
+        # کلیدهای timestamp/datetime قبلی از همان monotonic_ns مشتق می‌شوند
+        now_ns = time.monotonic_ns()
         alert = {
-            "timestamp": time.time(),
-            "datetime": datetime.now().isoformat(),
+            "id": next(self._alert_id_counter),
+            "timestamp_ns": now_ns,
+            "timestamp": _wall_seconds(now_ns),
+            "datetime": _format_ns(now_ns),
             "type": alert_type,
             "message": message,
             "severity": severity,
             "acknowledged": False,
         }
 
-        # جلوگیری از alert های تکراری
-        if not any(a["type"] == alert_type and not a["acknowledged"] for a in self.alerts):
-            self.alerts.append(alert)
-            print(f"⚠️ Alert: {message}")
+        # alert قدیمی‌ای که از deque بیرون می‌افتد دیگر باز محسوب نمی‌شود
+        if len(self.alerts) == self.alerts.maxlen:
+            evicted = self.alerts[0]
+            del self._alert_by_id[evicted["id"]]
+            if not evicted["acknowledged"]:
+                self._close_alert(evicted)
+
+        self.alerts.append(alert)
+        self._alert_by_id[alert["id"]] = alert
+        self._open_alert_types.add(alert_type)
+        self._alert_sev_open[severity] += 1
+        print(f"⚠️ Alert: {message}")
+
+    def _close_alert(self, alert: Dict):
+        """خارج کردن alert از شمارنده‌های alert های باز"""
+        self._open_alert_types.discard(alert["type"])
+        self._alert_sev_open[alert["severity"]] -= 1
+        if self._alert_sev_open[alert["severity"]] <= 0:
+            del self._alert_sev_open[alert["severity"]]
+
+    def _count_node_status(self, status: Optional[str], delta: int):
+        """به‌روزرسانی شمارنده نودهای فعال/غیرفعال"""
+        if status is None:
+            return
+        if status == "active":
+            self._node_active += delta
+        else:
+            self._node_inactive += delta
 
     def _update_stats(self):
         """به‌روزرسانی آمار کلی"""
@@ -268,21 +556,22 @@ class AdvancedDashboard:
 
     def add_event(self, event_type: str, message: str, **kwargs):
         """افزودن رویداد"""
-        event = {
-            "timestamp": time.time(),
-            "datetime": datetime.now().isoformat(),
-            "type": event_type,
-            "message": message,
-            **kwargs,
-        }
-        self.recent_events.append(event)
+        self.recent_events.append(
+            DashboardEvent(time.monotonic_ns(), event_type, message, kwargs or None)
+        )
 
     def register_node(self, node_id: str, node_info: Dict):
         """ثبت یک نود"""
+        previous = self.nodes.get(node_id)
+        self._count_node_status(previous["status"] if previous else None, -1)
+        self._count_node_status("active", 1)
+        now_ns = time.monotonic_ns()
         self.nodes[node_id] = {
             **node_info,
-            "registered_at": time.time(),
-            "last_seen": time.time(),
+            "registered_at_ns": now_ns,
+            "last_seen_ns": now_ns,
+            "registered_at": _wall_seconds(now_ns),
+            "last_seen": _wall_seconds(now_ns),
             "status": "active",
         }
         self.add_event("NODE_JOINED", f"Node {node_id} joined the network")
@@ -290,13 +579,19 @@ class AdvancedDashboard:
     def update_node(self, node_id: str, updates: Dict):
         """به‌روزرسانی اطلاعات نود"""
         if node_id in self.nodes:
-            self.nodes[node_id].update(updates)
-            self.nodes[node_id]["last_seen"] = time.time()
+            node = self.nodes[node_id]
+            old_status = node["status"]
+            node.update(updates)
+            node["last_seen_ns"] = now_ns = time.monotonic_ns()
+            node["last_seen"] = _wall_seconds(now_ns)
+            if node["status"] != old_status:
+                self._count_node_status(old_status, -1)
+                self._count_node_status(node["status"], 1)
 
     def remove_node(self, node_id: str):
         """حذف نود"""
         if node_id in self.nodes:
-            del self.nodes[node_id]
+            self._count_node_status(self.nodes.pop(node_id)["status"], -1)
             self.add_event("NODE_LEFT", f"Node {node_id} left the network")
 
     def get_summary(self) -> Dict[str, Any]:
@@ -304,9 +599,9 @@ class AdvancedDashboard:
         uptime = time.time() - self.stats["uptime_start"]
 
         # آخرین معیارها
-        latest_system = self.system_history[-1] if self.system_history else None
-        latest_blockchain = self.blockchain_history[-1] if self.blockchain_history else None
-        latest_ai = self.ai_history[-1] if self.ai_history else None
+        latest_system = self.system_history.latest()
+        latest_blockchain = self.blockchain_history.latest()
+        latest_ai = self.ai_history.latest()
 
         return {
             "timestamp": time.time(),
@@ -341,23 +636,19 @@ class AdvancedDashboard:
             },
             "alerts": {
                 "total": len(self.alerts),
-                "unacknowledged": len([a for a in self.alerts if not a["acknowledged"]]),
+                "unacknowledged": sum(self._alert_sev_open.values()),
                 "by_severity": self._count_by_severity(),
             },
             "nodes": {
                 "total": len(self.nodes),
-                "active": len([n for n in self.nodes.values() if n["status"] == "active"]),
-                "inactive": len([n for n in self.nodes.values() if n["status"] != "active"]),
+                "active": self._node_active,
+                "inactive": self._node_inactive,
             },
         }
 
     def _count_by_severity(self) -> Dict[str, int]:
         """شمارش alert ها بر اساس شدت"""
-        counts = defaultdict(int)
-        for alert in self.alerts:
-            if not alert["acknowledged"]:
-                counts[alert["severity"]] += 1
-        return dict(counts)
+        return dict(self._alert_sev_open)
 
     def get_time_series(self, metric_type: str, duration_seconds: int = 300) -> List[Dict]:
         """
@@ -381,35 +672,76 @@ class AdvancedDashboard:
         else:
             return []
 
-        return [asdict(item) for item in history if item.timestamp >= cutoff]
+        return history.since(cutoff)
 
-    def acknowledge_alert(self, alert_index: int):
-        """تأیید یک alert"""
-        if 0 <= alert_index < len(self.alerts):
-            self.alerts[alert_index]["acknowledged"] = True
-            self.alerts[alert_index]["acknowledged_at"] = time.time()
+    def acknowledge_alert(self, alert_id: int) -> bool:
+        """تأیید یک alert با شناسه آن"""
+        alert = self._alert_by_id.get(alert_id)
+        if alert is None:
+            return False
+        if not alert["acknowledged"]:
+            alert["acknowledged"] = True
+            alert["acknowledged_at_ns"] = now_ns = time.monotonic_ns()
+            alert["acknowledged_at"] = _wall_seconds(now_ns)
+            self._close_alert(alert)
+        return True
 
     def clear_acknowledged_alerts(self):
         """پاکسازی alert های تأیید شده"""
-        self.alerts = [a for a in self.alerts if not a["acknowledged"]]
-
-    def export_metrics(self, filepath: str):
-        """صادرات معیارها به فایل"""
-        data = {
+        for alert in self.alerts:
+            if alert["acknowledged"]:
+                del self._alert_by_id[alert["id"]]
+        self.alerts = deque(
+            (a for a in self.alerts if not a["acknowledged"]), maxlen=self.alerts.maxlen
+        )
+
+    def _export_snapshot(self) -> Dict[str, Any]:
+        """کپی داده‌های قابل صادرات (روی thread فراخوان، پیش از نوشتن)"""
+        return {
             "exported_at": datetime.now().isoformat(),
-            "system_metrics": [asdict(m) for m in self.system_history],
-            "blockchain_metrics": [asdict(m) for m in self.blockchain_history],
-            "ai_metrics": [asdict(m) for m in self.ai_history],
-            "stats": self.stats,
-            "alerts": self.alerts,
-            "nodes": self.nodes,
+            "system_metrics": self.system_history.to_columns(),
+            "blockchain_metrics": self.blockchain_history.to_columns(),
+            "ai_metrics": self.ai_history.to_columns(),
+            "stats": dict(self.stats),
+            "alerts": [dict(alert) for alert in self.alerts],
+            "events": [event.to_dict() for event in self.recent_events],
+            "nodes": {node_id: dict(node) for node_id, node in self.nodes.items()},
         }
 
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+    def export_metrics(self, filepath: str):
+        """صادرات معیارها به فایل"""
+        self._write_json(filepath, self._export_snapshot())
+        print(f"✅ Metrics exported to {filepath}")
 
+    async def export_metrics_async(self, filepath: str):
+        """صادرات معیارها به فایل (نوشتن در thread جداگانه)"""
+        data = self._export_snapshot()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._write_json, filepath, data)
         print(f"✅ Metrics exported to {filepath}")
 
+    @staticmethod
+    def _json_default(obj: Any) -> Any:
+        """تبدیل آرایه‌های NumPy (و سایر انواع) برای JSON"""
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        return str(obj)
+
+    @classmethod
+    def _write_json(cls, filepath: str, data: Dict[str, Any]):
+        """نوشتن JSON روی دیسک (blocking)"""
+        if orjson is not None:
+            payload = orjson.dumps(
+                data,
+                default=cls._json_default,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+            )
+        else:
+            payload = json.dumps(data, ensure_ascii=False, default=cls._json_default).encode()
+
+        with open(filepath, "wb") as f:
+            f.write(payload)
+
 
 # Singleton instance
 _dashboard_instance: Optional[AdvancedDashboard] = None
@@ -456,7 +788,7 @@ async def main():
     await dashboard.stop()
 
     # صادرات
-    dashboard.export_metrics("dashboard_metrics.json")
+    await dashboard.export_metrics_async("dashboard_metrics.json")
 
 
 if __name__ == "__main__":
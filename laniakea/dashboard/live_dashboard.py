@@ -3,48 +3,412 @@ Live Dashboard - داشبورد زنده و تعاملی
 رابط کاربری پیشرفته برای مانیتورینگ real-time
 """
 
+import functools
+import gzip
+import hashlib
 import json
+import math
+import mmap
+import os
+import struct
+import time
 from datetime import datetime
-from typing import Dict, List, Any
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional, Tuple
 from collections import deque
 
+import numpy as np
+from jinja2 import BaseLoader, Environment
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _json_default(obj: Any) -> Any:
+    """تبدیل آرایه‌ها/اسکالرهای NumPy که serializer مستقیم پشتیبانی نمی‌کند"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _dumps(obj: Any) -> str:
+    """serialize به JSON (با orjson در صورت وجود)"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(obj, ensure_ascii=False, default=_json_default)
+
+
+def _clock(ts_ns: int) -> str:
+    """قالب‌بندی timestamp (نانوثانیه) به صورت HH:MM:SS (هنگام خواندن)"""
+    return datetime.fromtimestamp(ts_ns / 1e9).strftime("%H:%M:%S")
+
+
+def _iso(ts_ns: int) -> str:
+    """timestamp (نانوثانیه) به صورت ISO، همان قالب قبلی کلید timestamp رکوردها"""
+    return datetime.fromtimestamp(ts_ns / 1e9).isoformat()
+
+
+# قالب HTML داشبورد یک بار در زمان import به bytecode Jinja2 کامپایل می‌شود
+_DASHBOARD_TEMPLATE = Environment(loader=BaseLoader(), autoescape=True).from_string(
+    """<!DOCTYPE html>
+<html lang="fa" dir="rtl">
+<head>
+    <meta charset="UTF-8">
+    <title>Laniakea Protocol - Live Dashboard</title>
+    <link rel="stylesheet" href="/static/style.css">
+</head>
+<body>
+    <div class="container">
+        <header>
+            <h1>🌌 پروتوکل لانیاکیا</h1>
+            <p class="subtitle">داشبورد زنده نود (v0.0.1)</p>
+        </header>
+        
+        <div class="stats-grid">
+            <div class="stat-card">
+                <span class="label">ارتفاع بلاک‌چین</span>
+                <span class="value">{{ chain_length }}</span>
+            </div>
+            
+            <div class="stat-card">
+                <span class="label">نودهای متصل</span>
+                <span class="value">{{ peer_count }}</span>
+            </div>
+            
+            <div class="stat-card">
+                <span class="label">ارزش دانشی کل</span>
+                <span class="value">{{ "%.0f"|format(total_value) }}</span>
+            </div>
+            
+            <div class="stat-card">
+                <span class="label">تسک‌های فعال</span>
+                <span class="value">{{ active_tasks }}</span>
+            </div>
+            
+            <div class="stat-card">
+                <span class="label">TPS شبکه</span>
+                <span class="value">{{ "%.2f"|format(tps) }}</span>
+            </div>
+        </div>
+        
+        <script id="chart-data" type="application/json">{{ chart_data|safe }}</script>
+        
+        <footer>
+            <span class="update-time">آخرین به‌روزرسانی: {{ timestamp }}</span>
+            <p>Laniakea Protocol v0.0.1 - The Cosmic Computational Organism</p>
+        </footer>
+    </div>
+</body>
+</html>"""
+)
+
+# پنجره زمانی (ثانیه) که در آن رندرهای با ورودی یکسان از کش برگردانده می‌شوند
+_RENDER_BUCKET_SECONDS = 5
+
+
+@functools.lru_cache(maxsize=8)
+def _render(values: tuple, timestamp_bucket: int) -> str:
+    """رندر قالب برای یک tuple از مقادیر؛ زمان فوتر به ابتدای bucket گرد می‌شود"""
+    chain_length, peer_count, total_value, active_tasks, tps, chart_data = values
+    return _DASHBOARD_TEMPLATE.render(
+        chain_length=chain_length,
+        peer_count=peer_count,
+        total_value=total_value,
+        active_tasks=active_tasks,
+        tps=tps,
+        chart_data=chart_data,
+        timestamp=datetime.fromtimestamp(timestamp_bucket * _RENDER_BUCKET_SECONDS).strftime(
+            "%Y-%m-%d %H:%M:%S"
+        ),
+    )
+
+
+def _kind(value: Any) -> str:
+    """نوع ستون مناسب برای یک مقدار: i (int64)، f (float64) یا O (object)"""
+    if isinstance(value, bool):
+        return "O"
+    if isinstance(value, (int, np.integer)):
+        return "i"
+    if isinstance(value, (float, np.floating)):
+        return "f"
+    return "O"
+
+
+_DTYPES = {"i": np.int64, "f": np.float64, "O": object}
+
+
+class _ColumnRing:
+    """
+    ring buffer ستونی (SoA) برای یک دسته متریک
+
+    هر فیلد یک آرایه از پیش تخصیص‌یافته است که در اولین مشاهده ساخته می‌شود؛
+    فیلدهای عددی float64/int64 و بقیه object هستند. آرایه valid مشخص می‌کند
+    کدام رکوردها آن فیلد را داشته‌اند.
+    """
+
+    __slots__ = ("capacity", "head", "size", "ts_ns", "columns", "valid")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.head = 0
+        self.size = 0
+        self.ts_ns = np.zeros(capacity, dtype=np.int64)
+        self.columns: Dict[str, np.ndarray] = {}
+        self.valid: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, ts_ns: int, data: Dict[str, Any]):
+        i = self.head
+        self.ts_ns[i] = ts_ns
+        for valid in self.valid.values():
+            valid[i] = False
+
+        for name, value in data.items():
+            col = self.columns.get(name)
+            kind = _kind(value)
+            if col is None:
+                col = self.columns[name] = np.zeros(self.capacity, dtype=_DTYPES[kind])
+                self.valid[name] = np.zeros(self.capacity, dtype=bool)
+            elif col.dtype.kind != "O" and kind != col.dtype.kind:
+                if col.dtype.kind == "i" and kind == "f":
+                    # int + float -> float64 (فقط یک بار کپی ستون)
+                    col = self._widen(name, "f")
+                elif not (col.dtype.kind == "f" and kind == "i"):
+                    # int بدون تغییر نوع در ستون float64 نوشته می‌شود؛ بقیه ترکیب‌ها -> object
+                    col = self._widen(name, "O")
+            try:
+                col[i] = value
+            except OverflowError:
+                col = self._widen(name, "O")
+                col[i] = value
+            self.valid[name][i] = True
+
+        self.head = (i + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def _widen(self, name: str, kind: str) -> np.ndarray:
+        col = self.columns[name] = self.columns[name].astype(_DTYPES[kind])
+        return col
+
+    def _tail(self, arr: np.ndarray, n: int) -> np.ndarray:
+        """n عنصر آخر به ترتیب زمانی"""
+        start = self.head - n
+        if start >= 0:
+            return arr[start : self.head]
+        return np.concatenate((arr[start:], arr[: self.head]))
+
+    def rows(self, limit: int) -> List[Dict[str, Any]]:
+        """بازسازی n رکورد آخر به صورت dict (فقط فیلدهایی که ثبت شده‌اند)"""
+        n = min(limit, self.size)
+        if n <= 0:
+            return []
+
+        rows = [{"timestamp": _iso(ts), "ts_ns": ts} for ts in self._tail(self.ts_ns, n).tolist()]
+        for name, col in self.columns.items():
+            values = self._tail(col, n).tolist()
+            valid = self._tail(self.valid[name], n).tolist()
+            for row, value, ok in zip(rows, values, valid):
+                if ok:
+                    row[name] = value
+        return rows
+
+    def to_columns(self, limit: int) -> Dict[str, np.ndarray]:
+        """n رکورد آخر به صورت ستونی؛ مقادیر ثبت‌نشده None می‌شوند"""
+        n = min(limit, self.size)
+        columns = {"ts_ns": self._tail(self.ts_ns, n)}
+        for name, col in self.columns.items():
+            values = self._tail(col, n)
+            valid = self._tail(self.valid[name], n)
+            if not valid.all():
+                values = np.where(valid, values.astype(object), None)
+            columns[name] = values
+        return columns
+
+    def count_since(self, since_ns: int) -> int:
+        """تعداد رکوردهای جدیدتر از since_ns (جستجوی دودویی روی ستون زمان)"""
+        if self.size < self.capacity:
+            return self.size - int(np.searchsorted(self.ts_ns[: self.size], since_ns, "right"))
+
+        # بافر پر: [head:] قدیمی‌تر و [:head] جدیدتر است
+        newer = self.ts_ns[: self.head]
+        count = len(newer) - int(np.searchsorted(newer, since_ns, "right"))
+        if count == len(newer):
+            older = self.ts_ns[self.head :]
+            count += len(older) - int(np.searchsorted(older, since_ns, "right"))
+        return count
+
+    def timestamps(self, limit: int) -> List[int]:
+        """ts_ns مربوط به n رکورد آخر"""
+        return self._tail(self.ts_ns, min(limit, self.size)).tolist()
+
+    def column(self, name: str, limit: int, default: Any = 0) -> List[Any]:
+        """n مقدار آخر یک فیلد؛ رکوردهای فاقد آن فیلد default می‌گیرند"""
+        n = min(limit, self.size)
+        col = self.columns.get(name)
+        if col is None:
+            return [default] * n
+        values = self._tail(col, n)
+        valid = self._tail(self.valid[name], n)
+        if col.dtype.kind == "O":
+            return [v if ok else default for v, ok in zip(values.tolist(), valid.tolist())]
+        return np.where(valid, values, default).tolist()
+
+
+# فیلدهای عددی هر دسته که در فایل ring ماندگار می‌شوند (بقیه فقط در حافظه)
+_PERSISTED_FIELDS = {
+    "blockchain": ("chain_length", "total_value", "active_tasks"),
+    "network": ("peer_count", "tps"),
+}
+
+
+class _RingFile:
+    """
+    فایل ring با اندازه ثابت (mmap) برای ماندگاری متریک‌ها بین راه‌اندازی‌ها
+
+    هر رکورد struct فشرده (ts_ns + یک float64 برای هر فیلد) است و head/count در
+    هدر فایل نگه داشته می‌شوند؛ فیلد ثبت‌نشده NaN ذخیره می‌شود.
+    """
+
+    _HEADER = struct.Struct("<8sQQ")
+    _MAGIC = b"LNKRING1"
+
+    def __init__(self, path: Path, fields: Tuple[str, ...], capacity: int):
+        self.fields = fields
+        self.capacity = capacity
+        self.record = struct.Struct("<q" + "d" * len(fields))
+        size = self._HEADER.size + capacity * self.record.size
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fresh = os.fstat(fd).st_size != size
+            if fresh:
+                # ظرفیت یا قالب متفاوت: فایل از نو ساخته می‌شود
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+            self._mm = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        magic, head, count = self._HEADER.unpack_from(self._mm, 0)
+        if fresh or magic != self._MAGIC or head >= capacity or count > capacity:
+            head = count = 0
+            self._HEADER.pack_into(self._mm, 0, self._MAGIC, head, count)
+        self.head = head
+        self.count = count
+
+    def append(self, ts_ns: int, data: Dict[str, Any]):
+        values = []
+        for name in self.fields:
+            try:
+                values.append(float(data[name]))
+            except (KeyError, TypeError, ValueError):
+                values.append(math.nan)
+
+        offset = self._HEADER.size + self.head * self.record.size
+        self.record.pack_into(self._mm, offset, ts_ns, *values)
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self._HEADER.pack_into(self._mm, 0, self._MAGIC, self.head, self.count)
+
+    def replay(self) -> Iterator[Tuple[int, Dict[str, float]]]:
+        """رکوردهای ذخیره‌شده به ترتیب زمانی"""
+        start = (self.head - self.count) % self.capacity
+        for k in range(self.count):
+            offset = self._HEADER.size + ((start + k) % self.capacity) * self.record.size
+            ts_ns, *values = self.record.unpack_from(self._mm, offset)
+            yield ts_ns, {
+                name: value for name, value in zip(self.fields, values) if not math.isnan(value)
+            }
+
+    def close(self):
+        self._mm.flush()
+        self._mm.close()
+
 
 class MetricsCollector:
     """جمع‌آوری و ذخیره متریک‌ها"""
 
-    def __init__(self, max_history: int = 1000):
+    def __init__(self, max_history: int = 1000, persist_dir: Optional[str] = None):
         self.max_history = max_history
         self.metrics = {
-            "blockchain": deque(maxlen=max_history),
-            "network": deque(maxlen=max_history),
-            "cognitive": deque(maxlen=max_history),
-            "performance": deque(maxlen=max_history),
-            "simulation": deque(maxlen=max_history),
+            category: _ColumnRing(max_history)
+            for category in ("blockchain", "network", "cognitive", "performance", "simulation")
         }
         self.alerts = deque(maxlen=100)
 
+        # با persist_dir، فیلدهای عددی اصلی در فایل‌های ring ذخیره و هنگام شروع بازیابی می‌شوند
+        self._files: Dict[str, _RingFile] = {}
+        if persist_dir:
+            directory = Path(persist_dir)
+            directory.mkdir(parents=True, exist_ok=True)
+            for category, fields in _PERSISTED_FIELDS.items():
+                ring_file = _RingFile(directory / f"{category}.ring", fields, max_history)
+                for ts_ns, data in ring_file.replay():
+                    self.metrics[category].append(ts_ns, data)
+                self._files[category] = ring_file
+
     def record(self, category: str, data: Dict[str, Any]):
         """ثبت یک متریک"""
-        entry = {"timestamp": datetime.now().isoformat(), **data}
+        ring = self.metrics.get(category)
+        if ring is None:
+            return
+
+        ts_ns = time.time_ns()
+        ring.append(ts_ns, data)
+        ring_file = self._files.get(category)
+        if ring_file is not None:
+            ring_file.append(ts_ns, data)
 
-        if category in self.metrics:
-            self.metrics[category].append(entry)
+    def close(self):
+        """بستن فایل‌های ring (در صورت فعال بودن ماندگاری)"""
+        for ring_file in self._files.values():
+            ring_file.close()
+        self._files.clear()
 
     def get_recent(self, category: str, limit: int = 100) -> List[Dict[str, Any]]:
         """دریافت متریک‌های اخیر"""
-        if category not in self.metrics:
+        ring = self.metrics.get(category)
+        if ring is None:
             return []
+        return ring.rows(limit)
+
+    def dump_recent(self, category: str, limit: int = 100) -> str:
+        """JSON ستونی متریک‌های اخیر، مستقیم از آرایه‌ها و بدون ساخت dict برای هر رکورد"""
+        ring = self.metrics.get(category)
+        if ring is None:
+            return "{}"
+        return _dumps(ring.to_columns(limit))
+
+    def delta(self, category: str, since_ns: int = 0, compress: bool = True) -> bytes:
+        """
+        JSON ستونی فقط رکوردهای جدیدتر از since_ns (آخرین ts_ns دیده‌شده توسط کلاینت)
 
-        return list(self.metrics[category])[-limit:]
+        به صورت پیش‌فرض با gzip فشرده می‌شود (برای Content-Encoding: gzip).
+        """
+        ring = self.metrics.get(category)
+        columns = ring.to_columns(ring.count_since(since_ns)) if ring is not None else {}
+        payload = _dumps(columns).encode()
+        return gzip.compress(payload, compresslevel=6) if compress else payload
 
     def get_summary(self) -> Dict[str, Any]:
         """خلاصه کلی متریک‌ها"""
         summary = {}
 
-        for category, data in self.metrics.items():
-            if data:
-                latest = data[-1]
-                summary[category] = {"latest": latest, "count": len(data)}
+        for category, ring in self.metrics.items():
+            if ring:
+                latest = ring.rows(1)[0]
+                summary[category] = {
+                    "latest": latest,
+                    "updated_at": latest["timestamp"],
+                    "count": len(ring),
+                }
 
         return summary
 
@@ -55,81 +419,64 @@ class DashboardGenerator:
     def __init__(self, metrics_collector: MetricsCollector):
         self.collector = metrics_collector
 
+        # آخرین HTML تولیدشده و digest آن (برای ETag)
+        self._last_key: Optional[bytes] = None
+        self._last_html: Optional[str] = None
+
+    @property
+    def etag(self) -> Optional[str]:
+        """digest آخرین رندر (برای If-None-Match / 304)"""
+        return self._last_key.hex() if self._last_key is not None else None
+
     def generate_html(self, blockchain_data: Dict = None, network_data: Dict = None) -> str:
         """تولید HTML داشبورد"""
 
-        if blockchain_data is None:
-            blockchain_data = {}
-        if network_data is None:
-            network_data = {}
-
-        chain_length = blockchain_data.get("chain_length", 0)
-        total_value = blockchain_data.get("total_value", 0)
-        active_tasks = blockchain_data.get("active_tasks", 0)
-        peer_count = network_data.get("peer_count", 0)
-        tps = network_data.get("tps", 0.0)
-
-        html = """<!DOCTYPE html>
-	<html lang="fa" dir="rtl">
-	<head>
-	    <meta charset="UTF-8">
-	    <title>Laniakea Protocol - Live Dashboard</title>
-	    <link rel="stylesheet" href="/static/style.css">
-	</head>
-	<body>
-	    <div class="container">
-	        <header>
-	            <h1>🌌 پروتوکل لانیاکیا</h1>
-	            <p class="subtitle">داشبورد زنده نود (v0.0.1)</p>
-	        </header>
-	        
-	        <div class="stats-grid">
-	            <div class="stat-card">
-	                <span class="label">ارتفاع بلاک‌چین</span>
-	                <span class="value">{chain_length}</span>
-	            </div>
-	            
-	            <div class="stat-card">
-	                <span class="label">نودهای متصل</span>
-	                <span class="value">{peer_count}</span>
-	            </div>
-	            
-	            <div class="stat-card">
-	                <span class="label">ارزش دانشی کل</span>
-	                <span class="value">{total_value:.0f}</span>
-	            </div>
-	            
-	            <div class="stat-card">
-	                <span class="label">تسک‌های فعال</span>
-	                <span class="value">{active_tasks}</span>
-	            </div>
-	            
-	            <div class="stat-card">
-	                <span class="label">TPS شبکه</span>
-	                <span class="value">{tps:.2f}</span>
-	            </div>
-	        </div>
-	        
-	        <footer>
-	            <span class="update-time">آخرین به‌روزرسانی: {timestamp}</span>
-	            <p>Laniakea Protocol v0.0.1 - The Cosmic Computational Organism</p>
-	        </footer>
-	    </div>
-	</body>
-	</html>""".format(
-            chain_length=chain_length,
-            peer_count=peer_count,
-            total_value=total_value,
-            active_tasks=active_tasks,
-            tps=tps,
-            timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        bd = blockchain_data or {}
+        nd = network_data or {}
+
+        # مقادیر None هم صفر در نظر گرفته می‌شوند تا format spec ها خطا ندهند
+        chain_length = bd.get("chain_length") or 0
+        total_value = bd.get("total_value") or 0
+        active_tasks = bd.get("active_tasks") or 0
+        peer_count = nd.get("peer_count") or 0
+        tps = nd.get("tps") or 0.0
+        chart_data = self._chart_data()
+
+        # مقادیر به دقت نمایش گرد می‌شوند تا ورودی‌های هم‌ارز کلید یکسان داشته باشند
+        values = (
+            chain_length,
+            peer_count,
+            round(total_value),
+            active_tasks,
+            round(tps, 2),
+            chart_data,
         )
+        html = _render(values, int(time.time()) // _RENDER_BUCKET_SECONDS)
 
+        # اگر خروجی تغییری نکرده، همان digest قبلی معتبر است
+        if html is not self._last_html:
+            self._last_key = hashlib.blake2b(html.encode(), digest_size=16).digest()
+            self._last_html = html
         return html
 
+    def _chart_data(self, points: int = 20) -> str:
+        """داده‌های نمودار در یک فراخوانی JSON"""
+        blockchain = self.collector.metrics["blockchain"]
+        network = self.collector.metrics["network"]
+
+        payload = {
+            "blockchain_labels": [_clock(ts) for ts in blockchain.timestamps(points)],
+            "blockchain_values": blockchain.column("chain_length", points),
+            "network_labels": [_clock(ts) for ts in network.timestamps(points)],
+            "network_values": network.column("tps", points),
+        }
+        # جلوگیری از بسته شدن زودهنگام تگ script
+        return _dumps(payload).replace("</", "<\\/")
+
 
-# Global instance
+# Global instances
 _metrics_collector = MetricsCollector()
+_dashboard_generator = DashboardGenerator(_metrics_collector)
 
 
 def get_metrics_collector() -> MetricsCollector:
@@ -139,5 +486,4 @@ def get_metrics_collector() -> MetricsCollector:
 
 def generate_dashboard(blockchain_data: Dict = None, network_data: Dict = None) -> str:
     """تولید HTML داشبورد"""
-    generator = DashboardGenerator(_metrics_collector)
-    return generator.generate_html(blockchain_data, network_data)
+    return _dashboard_generator.generate_html(blockchain_data, network_data)
@@ -1,26 +1,48 @@
 """
 Laniakea Protocol - External APIs Module
 ماژول یکپارچگی با API های خارجی
+
+نمادها به صورت lazy (PEP 562) از api_integrations بارگذاری می‌شوند تا import
+این پکیج به تنهایی وابستگی‌های HTTP را بارگذاری نکند.
 """
 
-from .api_integrations import (
-    APIProvider,
-    NASAClient,
-    WeatherClient,
-    FinancialClient,
-    WolframAlphaClient,
-    QuantumClient,
-    APIManager,
-    get_api_manager,
-)
+from typing import TYPE_CHECKING
 
 __all__ = [
+    "APIManager",
     "APIProvider",
+    "FinancialClient",
     "NASAClient",
+    "QuantumClient",
     "WeatherClient",
-    "FinancialClient",
     "WolframAlphaClient",
-    "QuantumClient",
-    "APIManager",
     "get_api_manager",
+    "request_cache_scope",
 ]
+
+if TYPE_CHECKING:
+    from .api_integrations import (
+        APIManager,
+        APIProvider,
+        FinancialClient,
+        NASAClient,
+        QuantumClient,
+        WeatherClient,
+        WolframAlphaClient,
+        get_api_manager,
+        request_cache_scope,
+    )
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        from . import api_integrations
+
+        value = getattr(api_integrations, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
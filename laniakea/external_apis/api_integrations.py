@@ -3,48 +3,320 @@ Laniakea Protocol - External API Integrations (Enhanced)
 یکپارچگی با API های خارجی با منطق Cache و Retry
 """
 
+from __future__ import annotations
+
 import os
 import asyncio
-import aiohttp
+import random
+import secrets
+import time
 import json
-from typing import Dict, Any, Optional, List
+import inspect
+from collections import OrderedDict
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 from enum import Enum
-from datetime import datetime, timedelta
-from functools import wraps
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import update_wrapper, wraps
+from urllib.parse import urlencode
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import aiohttp
+
+# decode/encode سریع JSON پاسخ‌ها (orjson اختیاری است)
+try:
+    import orjson
+
+    _loads = orjson.loads
+
+    def _json_serialize(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+
+except ImportError:
+    _loads = json.loads
+    _json_serialize = json.dumps
+
+# parse جریانی پاسخ‌های بزرگ (ijson اختیاری است)
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# کش پایدار روی دیسک برای endpointهای با TTL طولانی (diskcache اختیاری است)
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+# aiohttp فقط در اولین درخواست HTTP بارگذاری می‌شود
+_aiohttp = None
+
+
+def _get_aiohttp():
+    global _aiohttp
+    if _aiohttp is None:
+        import aiohttp as _aiohttp
+    return _aiohttp
+
+
+# --- Cache Mechanism (Async TTL LRU) ---
+CACHE_TTL_SECONDS = 3600.0
+_MISSING = object()
+
+# کش L1 در محدوده یک درخواست (فقط داخل request_cache_scope فعال است)
+_REQUEST_CACHE: ContextVar[Optional[Dict[str, Any]]] = ContextVar(
+    "_api_request_cache", default=None
+)
+
+
+@contextmanager
+def request_cache_scope():
+    """
+    کش L1 برای یک درخواست: داخل این scope هر کلید حداکثر یک بار از کش سراسری
+    خوانده می‌شود و تا پایان scope (بدون انقضا) همان مقدار برگردانده می‌شود.
+    task هایی که داخل scope ساخته شوند همین کش را به اشتراک می‌گذارند.
+    """
+    token = _REQUEST_CACHE.set({})
+    try:
+        yield
+    finally:
+        _REQUEST_CACHE.reset(token)
+
+
+class AsyncTTLCache:
+    """
+    کش LRU با انقضای زمانی برای پاسخ‌های API
+
+    هر ورودی به صورت (زمان انقضا روی ساعت monotonic به نانوثانیه، مقدار) نگه داشته می‌شود و
+    درخواست‌های هم‌زمان با کلید یکسان فقط یک فراخوانی HTTP انجام می‌دهند.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Tuple[int, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Any:
+        """مقدار کش‌شده یا _MISSING (ورودی منقضی همان‌جا حذف می‌شود)"""
+        l1 = _REQUEST_CACHE.get()
+        if l1 is not None:
+            value = l1.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        expiry, value = entry
+        if expiry <= time.monotonic_ns():
+            del self._data[key]
+            return _MISSING
+        self._data.move_to_end(key)
+        if l1 is not None:
+            l1[key] = value
+        return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        self._data[key] = (time.monotonic_ns() + int(ttl * 1e9), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+    async def get_or_fetch(self, key: str, ttl: float, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """خواندن از کش؛ در صورت نبود، یک fetch مشترک برای همه فراخوانی‌های هم‌زمان"""
+        value = self.get(key)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            # fetch در task جداگانه اجرا می‌شود تا لغو شدن فراخوان اول، بقیه منتظرها را لغو نکند
+            task = asyncio.ensure_future(self._fetch_and_store(key, ttl, fetch))
+            task.add_done_callback(_consume_exception)
+            self._inflight[key] = task
+        else:
+            self.hits += 1
+        result = await asyncio.shield(task)
+
+        l1 = _REQUEST_CACHE.get()
+        if l1 is not None and result and not result.get("error"):
+            l1[key] = result
+        return result
+
+    async def _fetch_and_store(
+        self, key: str, ttl: float, fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        try:
+            result = await fetch()
+        finally:
+            self._inflight.pop(key, None)
+
+        # فقط پاسخ‌های موفق کش می‌شوند
+        if result and not result.get("error"):
+            self.set(key, result, ttl)
+        return result
+
+
+def _consume_exception(task: asyncio.Future):
+    """جلوگیری از هشدار "exception was never retrieved" وقتی همه منتظرها لغو شده‌اند"""
+    if not task.cancelled():
+        task.exception()
+
+
+API_CACHE = AsyncTTLCache()
 
-# --- Cache Mechanism (Simple In-Memory) ---
-API_CACHE: Dict[str, Any] = {}
-CACHE_DURATION = timedelta(hours=1)
+# --- Persistent Cache (stale-while-revalidate) ---
+# مسیر پیش‌فرض؛ متغیر محیطی LANIAKEA_API_CACHE_DIR هنگام باز کردن کش بر آن مقدم است
+DISK_CACHE_DIR = "/var/cache/laniakea_api"
+# مدتی که ورودی منقضی پس از پایان TTL هنوز روی دیسک نگه داشته و به صورت stale سرو می‌شود
+DISK_CACHE_STALE_SECONDS = 7 * 86400.0
 
+_disk_cache = None
+_revalidating: set = set()
 
-def cache_result(key_prefix: str, duration: timedelta = CACHE_DURATION):
-    """دکوراتور برای کش کردن نتایج API"""
+
+def _get_disk_cache():
+    """باز کردن lazy کش دیسک؛ در نبود diskcache یا مسیر قابل نوشتن None برمی‌گرداند"""
+    global _disk_cache, diskcache
+    if _disk_cache is None and diskcache is not None:
+        try:
+            _disk_cache = diskcache.Cache(os.getenv("LANIAKEA_API_CACHE_DIR", DISK_CACHE_DIR))
+        except OSError:
+            diskcache = None
+    return _disk_cache
+
+
+def _revalidate(cache_key: str, ttl: float, fetch: Callable[[], Awaitable[Any]]):
+    """تازه‌سازی پس‌زمینه ورودی stale (فقط یک fetch برای هر کلید)"""
+    task = asyncio.ensure_future(API_CACHE.get_or_fetch(cache_key, ttl, fetch))
+    _revalidating.add(task)
+    task.add_done_callback(_revalidating.discard)
+    task.add_done_callback(_consume_exception)
+
+
+def _specialize(func, prefix: str, lookup):
+    """
+    ساخت wrapper اختصاصی با همان امضای func (بدون *args/**kwargs)
+
+    کلید کش مستقیماً از متغیرهای محلی با یک f-string ساخته می‌شود و هیچ tuple/dict
+    برای آرگومان‌ها ساخته نمی‌شود. اگر امضا *args، **kwargs یا پارامتر keyword-only
+    داشته باشد None برمی‌گرداند تا wrapper عمومی استفاده شود.
+    """
+    params = list(inspect.signature(func).parameters.values())
+    if any(p.kind is not inspect.Parameter.POSITIONAL_OR_KEYWORD for p in params):
+        return None
+    names = [p.name for p in params]
+    namespace = {"_func": func, "_lookup": lookup, "_prefix": prefix}
+    if any(name in namespace or name.startswith("_d") for name in names):
+        return None
+
+    signature = []
+    for i, p in enumerate(params):
+        if p.default is inspect.Parameter.empty:
+            signature.append(p.name)
+        else:
+            namespace[f"_d{i}"] = p.default
+            signature.append(f"{p.name}=_d{i}")
+    key = ":".join("{%s!s}" % name for name in names[1:])
+    source = (
+        f"async def {func.__name__}({', '.join(signature)}):\n"
+        f"    return await _lookup(_prefix + f\"{key}\", lambda: _func({', '.join(names)}))\n"
+    )
+    exec(source, namespace)
+    return update_wrapper(namespace[func.__name__], func)
+
+
+def cache_result(key_prefix: str, ttl_seconds: float = CACHE_TTL_SECONDS, persist: bool = False):
+    """
+    دکوراتور برای کش کردن نتایج API (ttl_seconds: مدت اعتبار به ثانیه)
+
+    با persist=True نتایج روی دیسک هم ذخیره می‌شوند تا پس از restart باقی بمانند؛
+    ورودی منقضی دیسک فوراً برگردانده شده و در پس‌زمینه تازه می‌شود.
+    """
 
     def decorator(func):
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
-            # ساخت کلید کش بر اساس نام تابع و آرگومان‌ها
-            key_parts = [key_prefix, func.__name__]
-            key_parts.extend(str(arg) for arg in args[1:])  # skip self
-            key_parts.extend(f"{k}={v}" for k, v in sorted(kwargs.items()))
-            cache_key = ":".join(key_parts)
+        # بخش ثابت کلید یک بار در زمان decorate ساخته می‌شود
+        prefix = f"{key_prefix}:{func.__name__}:"
+
+        if not persist:
 
-            # بررسی کش
-            if cache_key in API_CACHE:
-                timestamp, data = API_CACHE[cache_key]
-                if datetime.now() - timestamp < duration:
-                    # print(f"Cache hit for {cache_key}")
-                    return data
-                # print(f"Cache expired for {cache_key}")
+            def lookup(cache_key, call):
+                return API_CACHE.get_or_fetch(cache_key, ttl_seconds, call)
+
+        else:
 
-            # اجرای تابع
-            result = await func(*args, **kwargs)
+            async def lookup(cache_key, call):
+                disk = _get_disk_cache()
+                if disk is None:
+                    return await API_CACHE.get_or_fetch(cache_key, ttl_seconds, call)
+
+                async def fetch():
+                    result = await call()
+                    if result and not result.get("error"):
+                        # diskcache روی SQLite همگام است؛ در thread تا حلقه asyncio مسدود نشود
+                        await asyncio.to_thread(
+                            disk.set,
+                            cache_key,
+                            (time.time() + ttl_seconds, result),
+                            expire=ttl_seconds + DISK_CACHE_STALE_SECONDS,
+                        )
+                    return result
+
+                value = API_CACHE.get(cache_key)
+                if value is not _MISSING:
+                    API_CACHE.hits += 1
+                    return value
+
+                entry = await asyncio.to_thread(disk.get, cache_key)
+                if entry is not None:
+                    wall_expiry, value = entry
+                    remaining = wall_expiry - time.time()
+                    if remaining > 0:
+                        API_CACHE.hits += 1
+                        API_CACHE.set(cache_key, value, remaining)
+                    else:
+                        _revalidate(cache_key, ttl_seconds, fetch)
+                    return value
+
+                return await API_CACHE.get_or_fetch(cache_key, ttl_seconds, fetch)
+
+        specialized = _specialize(func, prefix, lookup)
+        if specialized is not None:
+            return specialized
 
-            # ذخیره در کش
-            if result and not result.get("error"):
-                API_CACHE[cache_key] = (datetime.now(), result)
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            # ساخت کلید کش بر اساس آرگومان‌ها (args[0] همان self است)
+            cache_key = prefix + ":".join(map(str, args[1:]))
+            if kwargs:
+                cache_key += "|" + ":".join(f"{k}={kwargs[k]}" for k in sorted(kwargs))
 
-            return result
+            return await lookup(cache_key, lambda: func(*args, **kwargs))
 
         return wrapper
 
@@ -52,27 +324,227 @@ def cache_result(key_prefix: str, duration: timedelta = CACHE_DURATION):
 
 
 # --- Retry Mechanism ---
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """تبدیل هدر Retry-After (ثانیه یا HTTP-date) به ثانیه"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def _backoff(attempt: int) -> float:
+    """تأخیر نمایی با jitter (بین 0.5 تا 1.5 برابر)"""
+    return min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt) * random.uniform(0.5, 1.5)
+
+
 async def fetch_with_retry(
-    session: aiohttp.ClientSession, url: str, params: Dict[str, Any], max_retries: int = 3
+    session: Optional[aiohttp.ClientSession],
+    url: str,
+    params: Optional[Dict[str, Any]] = None,
+    max_retries: int = 3,
 ):
-    """درخواست HTTP با منطق تلاش مجدد"""
+    """
+    درخواست HTTP با منطق تلاش مجدد (params=None برای URL از پیش ساخته‌شده)
+
+    پاسخ‌های 429/5xx و خطاهای اتصال با backoff نمایی + jitter دوباره امتحان
+    می‌شوند؛ اگر سرور Retry-After بدهد همان رعایت می‌شود.
+    """
+    aiohttp = _get_aiohttp()
+    if session is None:
+        session = await get_session()
     for attempt in range(max_retries):
+        last_attempt = attempt == max_retries - 1
         try:
             async with session.get(url, params=params) as response:
                 if response.status == 200:
-                    return await response.json()
-                elif response.status == 429:  # Rate Limit
-                    print(f"Rate limit hit. Retrying in {2**attempt} seconds...")
-                    await asyncio.sleep(2**attempt)
-                    continue
-                else:
+                    # bytes مستقیم به parser داده می‌شود (بدون decode میانی به str)
+                    body = await response.read()
+                    try:
+                        return _loads(body)
+                    except ValueError as e:
+                        return {"error": f"Invalid JSON: {e}"}
+                if response.status not in _RETRY_STATUSES or last_attempt:
                     return {"error": f"Status {response.status}", "detail": await response.text()}
-        except aiohttp.ClientError as e:
-            print(f"Connection error: {e}. Retrying in {2**attempt} seconds...")
-            await asyncio.sleep(2**attempt)
+
+                delay = _retry_after(response.headers.get("Retry-After"))
+                if delay is None:
+                    delay = _backoff(attempt)
+                elif delay > RETRY_MAX_DELAY:
+                    # انتظار طولانی‌تر از سقف: تلاش مجدد بی‌فایده است
+                    return {"error": f"Status {response.status}", "retry_after": delay}
+                print(f"Status {response.status}. Retrying in {delay:.1f} seconds...")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if last_attempt:
+                break
+            delay = _backoff(attempt)
+            print(f"Connection error: {e}. Retrying in {delay:.1f} seconds...")
+        await asyncio.sleep(delay)
     return {"error": "Max retries exceeded"}
 
 
+# --- Rate Limiting ---
+_T = TypeVar("_T")
+
+
+class _PerLoop(Generic[_T]):
+    """
+    یک primitive از asyncio به ازای هر event loop
+
+    Lock/Semaphore به اولین loop که رویشان منتظر می‌ماند گره می‌خورند؛ مثل get_session
+    با تغییر loop (مثلاً asyncio.run دوم) نمونه تازه ساخته می‌شود.
+    """
+
+    def __init__(self, factory: Callable[[], _T]):
+        self._factory = factory
+        self._value: Optional[_T] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def get(self) -> _T:
+        loop = asyncio.get_running_loop()
+        if self._value is None or self._loop is not loop:
+            self._value = self._factory()
+            self._loop = loop
+        return self._value
+
+
+class TokenBucket:
+    """
+    محدودکننده نرخ token-bucket
+
+    تا capacity درخواست پشت سر هم مجاز است و سپس refill_per_sec توکن در ثانیه
+    اضافه می‌شود؛ منتظرها به ترتیب ورود (قفل منصف asyncio) سرویس می‌گیرند.
+    """
+
+    def __init__(self, capacity: float, refill_per_sec: float):
+        self.capacity = capacity
+        self.refill_per_sec = refill_per_sec
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = _PerLoop(asyncio.Lock)
+
+    async def acquire(self):
+        async with self._lock.get():
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.refill_per_sec
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.refill_per_sec)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+# (ظرفیت، توکن در ثانیه) بر اساس سهمیه رایگان هر سرویس
+RATE_LIMITS = {
+    "nasa": (30, 1000 / 3600),  # 1000 درخواست در ساعت
+    "weather": (10, 1.0),  # 60 درخواست در دقیقه
+    "financial": (5, 5 / 60),  # 5 درخواست در دقیقه
+    "wolfram": (5, 1.0),
+}
+MAX_CONCURRENT_REQUESTS = 20
+
+
+# --- Shared HTTP Session ---
+# یک session در سطح ماژول برای همه کلاینت‌ها (pooling اتصال TCP/TLS بین درخواست‌ها)
+# پاسخ‌های NEO، Alpha Vantage و Wolfram صدها KB JSON هستند؛ فشرده دریافت و
+# با بافر خواندن بزرگ‌تر (به جای 64KB پیش‌فرض) از حالت فشرده خارج می‌شوند
+SESSION_HEADERS = {"Accept-Encoding": "gzip, deflate"}
+READ_BUFSIZE = 2**18
+
+_SESSION: Optional[aiohttp.ClientSession] = None
+_SESSION_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """session اشتراکی؛ در اولین استفاده (یا پس از بسته شدن / تغییر event loop) ساخته می‌شود"""
+    global _SESSION, _SESSION_LOOP
+    loop = asyncio.get_running_loop()
+    if _SESSION is None or _SESSION.closed or _SESSION_LOOP is not loop:
+        aiohttp = _get_aiohttp()
+        _SESSION = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=200,
+                limit_per_host=32,
+                use_dns_cache=True,
+                ttl_dns_cache=300,
+                force_close=False,
+                enable_cleanup_closed=True,
+                keepalive_timeout=75,
+            ),
+            timeout=aiohttp.ClientTimeout(total=60, connect=10),
+            headers=SESSION_HEADERS,
+            auto_decompress=True,
+            read_bufsize=READ_BUFSIZE,
+            json_serialize=_json_serialize,
+        )
+        _SESSION_LOOP = loop
+    return _SESSION
+
+
+async def close_session():
+    """بستن session اشتراکی (هنگام خاموش شدن)"""
+    global _SESSION, _SESSION_LOOP
+    if _SESSION is not None and not _SESSION.closed:
+        await _SESSION.close()
+    _SESSION = None
+    _SESSION_LOOP = None
+
+
+class BaseAPIClient:
+    """پایه مشترک کلاینت‌ها: دسترسی به session اشتراکی HTTP"""
+
+    def __init__(
+        self, session_provider: Optional[Callable[[], Awaitable[aiohttp.ClientSession]]] = None
+    ):
+        self._session_provider = session_provider or get_session
+
+        # توسط APIManager تنظیم می‌شوند (کلاینت مستقل بدون محدودیت است)
+        self.rate_limiter: Optional[TokenBucket] = None
+        self.concurrency: Optional[_PerLoop[asyncio.Semaphore]] = None
+
+    async def _session(self) -> aiohttp.ClientSession:
+        return await self._session_provider()
+
+    @asynccontextmanager
+    async def _limit(self):
+        """رعایت سهمیه نرخ و سقف هم‌زمانی، فقط برای درخواست‌های واقعی HTTP (نه cache hit)"""
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+        if self.concurrency is None:
+            yield
+        else:
+            async with self.concurrency.get():
+                yield
+
+    async def _get(self, url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """GET با session اشتراکی، retry و محدودیت نرخ"""
+        async with self._limit():
+            return await fetch_with_retry(await self._session(), url, params)
+
+
 class APIProvider(str, Enum):
     """ارائه‌دهندگان API"""
 
@@ -88,25 +560,37 @@ class APIProvider(str, Enum):
     GEOSPATIAL = "geospatial"  # برای داده‌های مکانی دقیق
 
 
-class NASAClient:
+# حداکثر طول بازه (روز) که NeoWs feed در یک درخواست می‌پذیرد
+NEO_FEED_MAX_DAYS = 7
+
+
+def _exception_error(exc: BaseException) -> Dict[str, Any]:
+    """خطای gather(return_exceptions=True) به شکل دیکشنری خطا (CancelledError پیام ندارد)"""
+    return {"error": str(exc) or type(exc).__name__}
+
+
+class NASAClient(BaseAPIClient):
     """
     کلاینت NASA APIs
     """
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, session_provider=None):
+        super().__init__(session_provider)
         self.api_key = api_key or os.getenv("NASA_API_KEY", "DEMO_KEY")
         self.base_url = "https://api.nasa.gov"
+        # URL کامل APOD بدون پارامتر اختیاری (مسیر پرتکرار)
+        self._apod_url = f"{self.base_url}/planetary/apod?{urlencode({'api_key': self.api_key})}"
 
     @cache_result("nasa_apod")
     async def get_apod(self, date: Optional[str] = None) -> Dict[str, Any]:
         """دریافت تصویر نجومی روز"""
+        if not date:
+            return await self._get(self._apod_url)
+
         url = f"{self.base_url}/planetary/apod"
-        params = {"api_key": self.api_key}
-        if date:
-            params["date"] = date
+        params = {"api_key": self.api_key, "date": date}
 
-        async with aiohttp.ClientSession() as session:
-            return await fetch_with_retry(session, url, params)
+        return await self._get(url, params)
 
     @cache_result("nasa_neo")
     async def get_near_earth_objects(
@@ -121,10 +605,102 @@ class NASAClient:
 
         params = {"start_date": start_date, "end_date": end_date, "api_key": self.api_key}
 
-        async with aiohttp.ClientSession() as session:
-            return await fetch_with_retry(session, url, params)
+        return await self._get(url, params)
+
+    async def get_near_earth_objects_range(self, start_date: str, end_date: str) -> Dict[str, Any]:
+        """
+        اجرام نزدیک به زمین برای بازه دلخواه
+
+        NeoWs حداکثر ۷ روز در هر درخواست می‌پذیرد؛ بازه به پنجره‌های ۷ روزه تقسیم،
+        پنجره‌ها به صورت موازی دریافت (هر کدام با کش خودش) و نتایج ادغام می‌شوند.
+        """
+        start = datetime.strptime(start_date, "%Y-%m-%d")
+        end = datetime.strptime(end_date, "%Y-%m-%d")
+        if end < start:
+            return {"error": "end_date must not be before start_date"}
+
+        windows = []
+        while start <= end:
+            window_end = min(start + timedelta(days=NEO_FEED_MAX_DAYS - 1), end)
+            windows.append((start.strftime("%Y-%m-%d"), window_end.strftime("%Y-%m-%d")))
+            start = window_end + timedelta(days=1)
+
+        results = await asyncio.gather(
+            *(self.get_near_earth_objects(s, e) for s, e in windows), return_exceptions=True
+        )
+
+        merged: Dict[str, Any] = {"element_count": 0, "near_earth_objects": {}}
+        errors = []
+        for (s, e), result in zip(windows, results):
+            if isinstance(result, BaseException):
+                result = _exception_error(result)
+            if result.get("error"):
+                errors.append({"start_date": s, "end_date": e, "error": result["error"]})
+                continue
+            merged["element_count"] += result.get("element_count", 0)
+            merged["near_earth_objects"].update(result.get("near_earth_objects", {}))
+
+        if errors:
+            if len(errors) == len(windows):
+                return {"error": errors[0]["error"], "windows": errors}
+            merged["partial_errors"] = errors
+        return merged
+
+    @cache_result("nasa_neo_summary")
+    async def get_near_earth_objects_summary(
+        self, start_date: Optional[str] = None, end_date: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        خلاصه اجرام نزدیک به زمین (تعداد کل، تعداد در هر روز، تعداد خطرناک)
+
+        با ijson پاسخ به صورت جریانی parse می‌شود و درخت کامل JSON ساخته نمی‌شود.
+        """
+        if not start_date:
+            start_date = datetime.now().strftime("%Y-%m-%d")
+        if not end_date:
+            end_date = (datetime.now() + timedelta(days=7)).strftime("%Y-%m-%d")
+
+        summary = {
+            "start_date": start_date,
+            "end_date": end_date,
+            "element_count": 0,
+            "by_date": {},
+            "hazardous_count": 0,
+        }
+
+        if ijson is None:
+            data = await self.get_near_earth_objects(start_date, end_date)
+            if data.get("error"):
+                return data
+            summary["element_count"] = data.get("element_count", 0)
+            for date, objects in data.get("near_earth_objects", {}).items():
+                summary["by_date"][date] = len(objects)
+                summary["hazardous_count"] += sum(
+                    1 for obj in objects if obj.get("is_potentially_hazardous_asteroid")
+                )
+            return summary
 
-    @cache_result("nasa_mars_rover", duration=timedelta(days=1))
+        url = f"{self.base_url}/neo/rest/v1/feed"
+        params = {"start_date": start_date, "end_date": end_date, "api_key": self.api_key}
+        session = await self._session()
+        async with self._limit(), session.get(url, params=params) as response:
+            if response.status != 200:
+                return {"error": f"Status {response.status}", "detail": await response.text()}
+
+            # prefix ها: element_count و near_earth_objects.<date>.item[...]
+            async for prefix, event, value in ijson.parse(response.content):
+                if prefix == "element_count":
+                    summary["element_count"] = int(value)
+                elif not prefix.startswith("near_earth_objects."):
+                    continue
+                elif event == "start_map" and prefix.count(".") == 2:
+                    date = prefix.split(".", 2)[1]
+                    summary["by_date"][date] = summary["by_date"].get(date, 0) + 1
+                elif value is True and prefix.endswith(".item.is_potentially_hazardous_asteroid"):
+                    summary["hazardous_count"] += 1
+        return summary
+
+    @cache_result("nasa_mars_rover", ttl_seconds=86400, persist=True)
     async def get_mars_rover_photos(
         self, rover: str = "curiosity", sol: int = 1000, camera: Optional[str] = None
     ) -> Dict[str, Any]:
@@ -134,18 +710,46 @@ class NASAClient:
         if camera:
             params["camera"] = camera
 
-        async with aiohttp.ClientSession() as session:
-            return await fetch_with_retry(session, url, params)
+        return await self._get(url, params)
 
-
-class WeatherClient:
+    async def get_mars_rover_photos_range(
+        self,
+        rover: str = "curiosity",
+        sols: Optional[List[int]] = None,
+        camera: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """دریافت موازی تصاویر مریخ‌نورد برای چند sol و ادغام آن‌ها"""
+        sols = list(sols or [1000])
+        results = await asyncio.gather(
+            *(self.get_mars_rover_photos(rover, sol, camera) for sol in sols),
+            return_exceptions=True,
+        )
+
+        photos: List[Dict[str, Any]] = []
+        errors = {}
+        for sol, result in zip(sols, results):
+            if isinstance(result, BaseException):
+                result = _exception_error(result)
+            if result.get("error"):
+                errors[sol] = result["error"]
+            else:
+                photos.extend(result.get("photos", []))
+
+        merged: Dict[str, Any] = {"photos": photos}
+        if errors:
+            merged["partial_errors"] = errors
+        return merged
+
+
+class WeatherClient(BaseAPIClient):
     """کلاینت OpenWeatherMap API"""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, session_provider=None):
+        super().__init__(session_provider)
         self.api_key = api_key or os.getenv("OPENWEATHER_API_KEY")
         self.base_url = "https://api.openweathermap.org/data/2.5"
 
-    @cache_result("weather_current", duration=timedelta(minutes=10))
+    @cache_result("weather_current", ttl_seconds=600)
     async def get_current_weather(
         self, city: Optional[str] = None, lat: Optional[float] = None, lon: Optional[float] = None
     ) -> Dict[str, Any]:
@@ -164,10 +768,9 @@ class WeatherClient:
         else:
             return {"error": "City or coordinates required"}
 
-        async with aiohttp.ClientSession() as session:
-            return await fetch_with_retry(session, url, params)
+        return await self._get(url, params)
 
-    @cache_result("weather_forecast", duration=timedelta(hours=3))
+    @cache_result("weather_forecast", ttl_seconds=3 * 3600)
     async def get_forecast(
         self, city: Optional[str] = None, lat: Optional[float] = None, lon: Optional[float] = None
     ) -> Dict[str, Any]:
@@ -186,18 +789,31 @@ class WeatherClient:
         else:
             return {"error": "City or coordinates required"}
 
-        async with aiohttp.ClientSession() as session:
-            return await fetch_with_retry(session, url, params)
+        return await self._get(url, params)
+
+
+# ستون‌های سری زمانی Alpha Vantage به ترتیب ohlcv
+_OHLCV_FIELDS = ("1. open", "2. high", "3. low", "4. close", "5. volume")
 
 
-class FinancialClient:
+class FinancialClient(BaseAPIClient):
     """کلاینت Alpha Vantage API"""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, session_provider=None):
+        super().__init__(session_provider)
         self.api_key = api_key or os.getenv("ALPHAVANTAGE_API_KEY")
         self.base_url = "https://www.alphavantage.co/query"
-
-    @cache_result("financial_stock", duration=timedelta(hours=4))
+        # URL کامل قیمت BTC/USD (پارامترهای پیش‌فرض get_crypto_price)
+        self._crypto_default_url = f"{self.base_url}?" + urlencode(
+            {
+                "function": "DIGITAL_CURRENCY_DAILY",
+                "symbol": "BTC",
+                "market": "USD",
+                "apikey": self.api_key or "",
+            }
+        )
+
+    @cache_result("financial_stock", ttl_seconds=4 * 3600)
     async def get_stock_price(self, symbol: str) -> Dict[str, Any]:
         """دریافت قیمت سهام"""
         if not self.api_key:
@@ -205,15 +821,60 @@ class FinancialClient:
 
         params = {"function": "TIME_SERIES_DAILY", "symbol": symbol, "apikey": self.api_key}
 
-        async with aiohttp.ClientSession() as session:
-            return await fetch_with_retry(session, self.base_url, params)
+        return await self._get(self.base_url, params)
+
+    @cache_result("financial_stock_series", ttl_seconds=4 * 3600)
+    async def get_stock_series(self, symbol: str) -> Dict[str, Any]:
+        """
+        سری زمانی روزانه سهام به صورت آرایه‌های numpy (ترتیب صعودی تاریخ)
+
+        dates آرایه datetime64[D] و ohlcv آرایه (N, 5) از open/high/low/close/volume است؛
+        تبدیل رشته به عدد فقط یک بار هنگام دریافت انجام و همین شکل ساختاریافته کش می‌شود.
+        از طریق APIManager.query_api آرایه‌ها به list (تاریخ‌ها به رشته ISO) تبدیل می‌شوند.
+        """
+        if not self.api_key:
+            return {"error": "API key not configured"}
 
-    @cache_result("financial_crypto", duration=timedelta(minutes=15))
+        params = {"function": "TIME_SERIES_DAILY", "symbol": symbol, "apikey": self.api_key}
+        data = await self._get(self.base_url, params)
+        if data.get("error"):
+            return data
+
+        series = data.get("Time Series (Daily)")
+        if not series:
+            # Alpha Vantage محدودیت نرخ را با 200 و کلید Note/Information گزارش می‌دهد
+            return {
+                "error": data.get("Note") or data.get("Information") or "No time series in response"
+            }
+
+        days = sorted(series)
+        dates = np.array(days, dtype="datetime64[D]")
+        ohlcv = np.empty((len(days), len(_OHLCV_FIELDS)), dtype=np.float64)
+        for i, day in enumerate(days):
+            row = series[day]
+            ohlcv[i] = [float(row[field]) for field in _OHLCV_FIELDS]
+
+        return {"symbol": symbol, "dates": dates, "ohlcv": ohlcv}
+
+    async def get_stock_prices(self, symbols: List[str]) -> Dict[str, Any]:
+        """دریافت موازی قیمت چند سهام (هر نماد با کش و محدودیت نرخ خودش)"""
+        results = await asyncio.gather(
+            *(self.get_stock_price(symbol) for symbol in symbols), return_exceptions=True
+        )
+        return {
+            symbol: _exception_error(result) if isinstance(result, BaseException) else result
+            for symbol, result in zip(symbols, results)
+        }
+
+    @cache_result("financial_crypto", ttl_seconds=900)
     async def get_crypto_price(self, symbol: str = "BTC", market: str = "USD") -> Dict[str, Any]:
         """دریافت قیمت ارز دیجیتال"""
         if not self.api_key:
             return {"error": "API key not configured"}
 
+        if symbol == "BTC" and market == "USD":
+            return await self._get(self._crypto_default_url)
+
         params = {
             "function": "DIGITAL_CURRENCY_DAILY",
             "symbol": symbol,
@@ -221,10 +882,9 @@ class FinancialClient:
             "apikey": self.api_key,
         }
 
-        async with aiohttp.ClientSession() as session:
-            return await fetch_with_retry(session, self.base_url, params)
+        return await self._get(self.base_url, params)
 
-    @cache_result("financial_indicator", duration=timedelta(days=1))
+    @cache_result("financial_indicator", ttl_seconds=86400, persist=True)
     async def get_economic_indicator(
         self, indicator: str = "GDP", interval: str = "annual"
     ) -> Dict[str, Any]:
@@ -234,18 +894,18 @@ class FinancialClient:
 
         params = {"function": indicator, "interval": interval, "apikey": self.api_key}
 
-        async with aiohttp.ClientSession() as session:
-            return await fetch_with_retry(session, self.base_url, params)
+        return await self._get(self.base_url, params)
 
 
-class WolframAlphaClient:
+class WolframAlphaClient(BaseAPIClient):
     """کلاینت Wolfram Alpha API"""
 
-    def __init__(self, app_id: Optional[str] = None):
+    def __init__(self, app_id: Optional[str] = None, session_provider=None):
+        super().__init__(session_provider)
         self.app_id = app_id or os.getenv("WOLFRAM_APP_ID")
         self.base_url = "http://api.wolframalpha.com/v2/query"
 
-    @cache_result("wolfram_query", duration=timedelta(days=7))
+    @cache_result("wolfram_query", ttl_seconds=7 * 86400, persist=True)
     async def query(self, input_query: str, format: str = "plaintext") -> Dict[str, Any]:
         """اجرای یک کوئری محاسباتی/دانشی"""
         if not self.app_id:
@@ -253,14 +913,17 @@ class WolframAlphaClient:
 
         params = {"input": input_query, "appid": self.app_id, "output": "json", "format": format}
 
-        async with aiohttp.ClientSession() as session:
-            # Wolfram Alpha API XML برمی‌گرداند، اما با output=json می‌توان JSON گرفت
-            response_data = await fetch_with_retry(session, self.base_url, params)
+        # Wolfram Alpha API XML برمی‌گرداند، اما با output=json می‌توان JSON گرفت
+        response_data = await self._get(self.base_url, params)
+
+        # پردازش پاسخ JSON Wolfram Alpha
+        if response_data and response_data.get("queryresult"):
+            return response_data["queryresult"]
+        return response_data
+
 
-            # پردازش پاسخ JSON Wolfram Alpha
-            if response_data and response_data.get("queryresult"):
-                return response_data["queryresult"]
-            return response_data
+# مولد اختصاصی شبیه‌ساز کوانتومی؛ یک بار ساخته و seed می‌شود
+_QUANTUM_RNG = random.Random()
 
 
 class QuantumClient:
@@ -275,14 +938,15 @@ class QuantumClient:
     async def get_quantum_random_number(self, bits: int = 16) -> Dict[str, Any]:
         """شبیه‌سازی تولید عدد تصادفی کوانتومی"""
         await asyncio.sleep(0.1)  # شبیه‌سازی تأخیر
-        random_int = random.getrandbits(bits)
+        # بیت‌ها مستقیم از CSPRNG سیستم‌عامل (os.urandom) گرفته می‌شوند
+        random_int = secrets.randbits(bits)
         return {"random_number": random_int, "bits": bits, "source": "simulated_quantum_randomness"}
 
     async def get_quantum_entanglement_status(self) -> Dict[str, Any]:
         """شبیه‌سازی وضعیت درهم‌تنیدگی کوانتومی"""
         await asyncio.sleep(0.2)
-        status = "stable" if random.random() > 0.1 else "decoherence_detected"
-        return {"status": status, "qubits": 5, "fidelity": random.uniform(0.8, 0.99)}
+        status = "stable" if _QUANTUM_RNG.random() > 0.1 else "decoherence_detected"
+        return {"status": status, "qubits": 5, "fidelity": _QUANTUM_RNG.uniform(0.8, 0.99)}
 
 
 class APIManager:
@@ -294,29 +958,83 @@ class APIManager:
         self.financial_client = FinancialClient()
         self.wolfram_client = WolframAlphaClient()
         self.quantum_client = QuantumClient()
+
+        self._clients = {
+            APIProvider.NASA: self.nasa_client,
+            APIProvider.WEATHER: self.weather_client,
+            APIProvider.FINANCIAL: self.financial_client,
+            APIProvider.WOLFRAM: self.wolfram_client,
+            APIProvider.QUANTUM_COMPUTING: self.quantum_client,
+        }
+        # سقف مشترک درخواست‌های هم‌زمان HTTP و token-bucket جداگانه برای هر provider
+        # (primitive های asyncio برای هر event loop جداگانه ساخته می‌شوند)
+        self._semaphore = _PerLoop(lambda: asyncio.Semaphore(MAX_CONCURRENT_REQUESTS))
+        self._buckets = {
+            APIProvider(name): TokenBucket(*limits) for name, limits in RATE_LIMITS.items()
+        }
+        for provider, bucket in self._buckets.items():
+            self._clients[provider].rate_limiter = bucket
+            self._clients[provider].concurrency = self._semaphore
+
+        # جدول (provider, endpoint) -> متد async کلاینت، یک بار در زمان ساخت
+        self._dispatch: Dict[Tuple[APIProvider, str], Callable[..., Awaitable[Dict[str, Any]]]] = {
+            (provider, name): getattr(client, name)
+            for provider, client in self._clients.items()
+            for name in dir(client)
+            if not name.startswith("_") and asyncio.iscoroutinefunction(getattr(client, name))
+        }
         self.stats = {
             "total_requests": 0,
             "cache_hits": 0,
             "last_reset": datetime.now().isoformat(),
         }
 
+    async def session(self) -> aiohttp.ClientSession:
+        """session اشتراکی HTTP"""
+        return await get_session()
+
+    async def close(self):
+        """بستن session اشتراکی (هنگام خاموش شدن سرویس)"""
+        await close_session()
+
     def get_client(self, provider: APIProvider):
         """دریافت کلاینت بر اساس نام"""
-        if provider == APIProvider.NASA:
-            return self.nasa_client
-        elif provider == APIProvider.WEATHER:
-            return self.weather_client
-        elif provider == APIProvider.FINANCIAL:
-            return self.financial_client
-        elif provider == APIProvider.WOLFRAM:
-            return self.wolfram_client
-        elif provider == APIProvider.QUANTUM_COMPUTING:
-            return self.quantum_client
-        # ... سایر کلاینت‌ها
-        return None
+        return self._clients.get(provider)
+
+    async def query_api(
+        self, provider: APIProvider, endpoint: str, params: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """اجرای یک متد کلاینت (مثلاً nasa / get_apod) با پارامترهای داده‌شده"""
+        # APIProvider یک str enum است؛ کلید با رشته خام (مثلاً "nasa") هم پیدا می‌شود
+        handler = self._dispatch.get((provider, endpoint))
+        if handler is None:
+            return {"error": f"Unknown endpoint: {getattr(provider, 'value', provider)}/{endpoint}"}
+
+        self.stats["total_requests"] += 1
+        return _json_ready(await handler(**(params or {})))
+
+    async def query_batch(
+        self, requests: List[Tuple[APIProvider, str, Optional[Dict[str, Any]]]]
+    ) -> List[Dict[str, Any]]:
+        """اجرای هم‌زمان چند درخواست؛ نتایج به همان ترتیب ورودی برگردانده می‌شوند"""
+
+        # هم‌زمانی HTTP با semaphore مشترک کلاینت‌ها محدود می‌شود (cache hit ها آزادند)
+        with request_cache_scope():
+            results = await asyncio.gather(
+                *(
+                    self.query_api(provider, endpoint, params)
+                    for provider, endpoint, params in requests
+                ),
+                return_exceptions=True,
+            )
+        return [
+            _exception_error(result) if isinstance(result, BaseException) else result
+            for result in results
+        ]
 
     def get_stats(self) -> Dict[str, Any]:
         """دریافت آمار API Manager"""
+        self.stats["cache_hits"] = API_CACHE.hits
         return {
             "clients_initialized": [p.value for p in APIProvider],
             "cache_size": len(API_CACHE),
@@ -324,6 +1042,20 @@ class APIManager:
         }
 
 
+def _json_ready(result: Dict[str, Any]) -> Dict[str, Any]:
+    """تبدیل آرایه‌های numpy نتیجه به list تا خروجی dispatch مستقیم قابل serialize باشد"""
+    if not any(isinstance(value, np.ndarray) for value in result.values()):
+        return result
+    return {
+        key: (
+            (np.datetime_as_string(value) if value.dtype.kind == "M" else value).tolist()
+            if isinstance(value, np.ndarray)
+            else value
+        )
+        for key, value in result.items()
+    }
+
+
 # Singleton
 _api_manager: Optional[APIManager] = None
 
@@ -351,5 +1083,7 @@ if __name__ == "__main__":
         q_rand = await manager.quantum_client.get_quantum_random_number(bits=32)
         print(f"Quantum Random: {q_rand.get('random_number')}")
 
+        await manager.close()
+
     # os.environ["NASA_API_KEY"] = "DEMO_KEY" # برای تست
     # asyncio.run(main())
@@ -62,10 +62,7 @@ class DAO:
         community's votes actually count - the genesis wallet alone cannot
         carry or kill a proposal.
         """
-        locked = sum(
-            bal for addr, bal in self.token_holders.items()
-            if addr in {"Genesis_Wallet", "Treasury"}
-        )
+        locked = self.token_holders.get("Genesis_Wallet", 0) + self.token_holders.get("Treasury", 0)
         return max(self.total_token_supply - locked, 1)
 
     def register_voter(self, address: str, balance: int) -> None:
@@ -33,9 +33,10 @@ import os
 import threading
 import time
 import uuid
+from collections import defaultdict
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional, Protocol
+from typing import Any, Callable, Dict, List, Optional, Protocol, Set
 
 from .dao import DAO, Proposal  # re-export the original
 
@@ -77,9 +78,12 @@ class ProposalAction:
 
     kind: str
     payload: Dict[str, Any]
+    # Typed view of ``payload``, parsed once by the handler when the
+    # proposal is created so execution never re-coerces it.
+    params: Optional[Any] = field(default=None, repr=False, compare=False)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Vote:
     voter: str
     weight: int
@@ -87,6 +91,15 @@ class Vote:
     timestamp: float
     delegated_from: List[str] = field(default_factory=list)
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "voter": self.voter,
+            "weight": self.weight,
+            "choice": self.choice,
+            "timestamp": self.timestamp,
+            "delegated_from": list(self.delegated_from),
+        }
+
 
 @dataclass
 class Delegation:
@@ -101,7 +114,7 @@ class Delegation:
         return (not self.revoked) and self.lock_until > now
 
 
-@dataclass
+@dataclass(slots=True)
 class ProposalV2:
     proposal_id: int
     title: str
@@ -121,6 +134,42 @@ class ProposalV2:
     quorum: float = 0.10  # 10% of circulating supply
     pass_threshold: float = 0.5  # >50% of for/against
     metadata: Dict[str, Any] = field(default_factory=dict)
+    # Running per-choice weight totals and a voter -> position index into
+    # ``votes``, kept in step by ``add_vote`` so neither ``tally`` nor a
+    # re-vote ever rescans the list.
+    _weights: Dict[str, int] = field(
+        default_factory=lambda: {"for": 0, "against": 0, "abstain": 0},
+        init=False,
+        repr=False,
+        compare=False,
+    )
+    _vote_index: Dict[str, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # Serialised form of each vote, built once when the vote is cast
+    # (votes are never mutated afterwards) and reused by every snapshot.
+    _vote_rows: List[Dict[str, Any]] = field(default_factory=list, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        votes, self.votes = self.votes, []
+        for v in votes:
+            self.add_vote(v)
+
+    def add_vote(self, vote: Vote) -> Optional[Vote]:
+        """Record ``vote``, replacing (in place) the voter's earlier vote if any."""
+        self._weights[vote.choice] += vote.weight
+        idx = self._vote_index.get(vote.voter)
+        if idx is None:
+            self._vote_index[vote.voter] = len(self.votes)
+            self.votes.append(vote)
+            self._vote_rows.append(vote.to_dict())
+            return None
+        previous = self.votes[idx]
+        self._weights[previous.choice] -= previous.weight
+        self.votes[idx] = vote
+        self._vote_rows[idx] = vote.to_dict()
+        return previous
+
+    def has_voted(self, voter: str) -> bool:
+        return voter in self._vote_index
 
     def snapshot(self) -> Dict[str, Any]:
         return {
@@ -137,8 +186,8 @@ class ProposalV2:
             "queued_at": self.queued_at,
             "executable_at": self.executable_at,
             "executed_at": self.executed_at,
-            "actions": [a.__dict__ for a in self.actions],
-            "votes": [v.__dict__ for v in self.votes],
+            "actions": [{"kind": a.kind, "payload": a.payload} for a in self.actions],
+            "votes": list(self._vote_rows),
             "quorum": self.quorum,
             "pass_threshold": self.pass_threshold,
             "metadata": dict(self.metadata),
@@ -146,9 +195,9 @@ class ProposalV2:
         }
 
     def tally(self) -> Dict[str, int]:
-        votes_for = sum(v.weight for v in self.votes if v.choice == "for")
-        votes_against = sum(v.weight for v in self.votes if v.choice == "against")
-        votes_abstain = sum(v.weight for v in self.votes if v.choice == "abstain")
+        votes_for = self._weights["for"]
+        votes_against = self._weights["against"]
+        votes_abstain = self._weights["abstain"]
         return {
             "for": votes_for,
             "against": votes_against,
@@ -234,20 +283,48 @@ class ActionHandler(Protocol):
     """A pluggable executor for a single proposal action.
 
     Handlers MUST be idempotent: ``execute`` can be called more than
-    once, and only the first call should have a side effect.
+    once, and only the first call should have a side effect. A handler
+    may also define ``parse(payload)``; the DAO then stores the typed
+    result on ``action.params`` when the proposal is created.
     """
 
     def execute(self, action: ProposalAction, treasury: Treasury) -> Dict[str, Any]: ...
 
 
+@dataclass(frozen=True)
+class TreasurySpendParams:
+    asset: str
+    amount: int
+    to: str
+
+
+@dataclass(frozen=True)
+class ParameterUpdateParams:
+    key: str
+    value: Any
+
+
+@dataclass(frozen=True)
+class BreedingContractParams:
+    parent_a: str
+    parent_b: str
+    issued_by: str
+    ttl_seconds: int
+
+
 class TreasurySpendHandler:
     """Execute a treasury spend: ``{"asset": "LANA", "to": "...", "amount": 100}``."""
 
+    def parse(self, payload: Dict[str, Any]) -> TreasurySpendParams:
+        return TreasurySpendParams(
+            asset=str(payload.get("asset", "LANA")),
+            amount=int(payload.get("amount", 0)),
+            to=str(payload.get("to", "")),
+        )
+
     def execute(self, action: ProposalAction, treasury: Treasury) -> Dict[str, Any]:
-        p = action.payload
-        asset = str(p.get("asset", "LANA"))
-        amount = int(p.get("amount", 0))
-        to = str(p.get("to", ""))
+        params = action.params or self.parse(action.payload)
+        asset, amount, to = params.asset, params.amount, params.to
         if amount <= 0 or not to:
             return {"executed": False, "error": "invalid_payload"}
         try:
@@ -267,12 +344,14 @@ class ParameterUpdateHandler:
     def __init__(self, dao: "GovernanceDAO") -> None:
         self.dao = dao
 
+    def parse(self, payload: Dict[str, Any]) -> ParameterUpdateParams:
+        return ParameterUpdateParams(key=str(payload.get("key", "")), value=payload.get("value"))
+
     def execute(self, action: ProposalAction, treasury: Treasury) -> Dict[str, Any]:
-        key = str(action.payload.get("key", ""))
-        if not key:
+        params = action.params or self.parse(action.payload)
+        if not params.key:
             return {"executed": False, "error": "missing_key"}
-        value = action.payload.get("value")
-        return self.dao.set_parameter(key, value)
+        return self.dao.set_parameter(params.key, params.value)
 
 
 class BreedingContractHandler:
@@ -281,17 +360,25 @@ class BreedingContractHandler:
     def __init__(self) -> None:
         self._issued: List[Dict[str, Any]] = []
 
+    def parse(self, payload: Dict[str, Any]) -> BreedingContractParams:
+        return BreedingContractParams(
+            parent_a=str(payload.get("parent_a", "")),
+            parent_b=str(payload.get("parent_b", "")),
+            issued_by=str(payload.get("issued_by", "dao")),
+            ttl_seconds=int(payload.get("ttl_seconds", 86400)),
+        )
+
     def execute(self, action: ProposalAction, treasury: Treasury) -> Dict[str, Any]:
-        p = action.payload
         try:
+            params = action.params or self.parse(action.payload)
             from laniakea.intelligence.breeding import get_breeding_engine
 
             eng = get_breeding_engine()
             c = eng.issue_contract(
-                parent_a=str(p.get("parent_a", "")),
-                parent_b=str(p.get("parent_b", "")),
-                issued_by=str(p.get("issued_by", "dao")),
-                ttl_seconds=int(p.get("ttl_seconds", 86400)),
+                parent_a=params.parent_a,
+                parent_b=params.parent_b,
+                issued_by=params.issued_by,
+                ttl_seconds=params.ttl_seconds,
             )
             record = c.__dict__
             self._issued.append(record)
@@ -399,6 +486,8 @@ class GovernanceDAO:
         self.audit = audit or AuditLog()
         self.legacy = legacy or DAO()
         self.proposals: Dict[int, ProposalV2] = {}
+        # state -> proposal ids; every transition goes through ``_set_state``
+        self._by_state: Dict[ProposalState, Set[int]] = defaultdict(set)
         self.delegations: List[Delegation] = []
         self._parameters: Dict[str, Any] = {
             "voting_period_seconds": self.config.voting_period_seconds,
@@ -460,12 +549,13 @@ class GovernanceDAO:
         weight = weight if weight is not None else bal
         weight = max(1, min(int(weight), bal))
         lock_s = lock_seconds if lock_seconds is not None else self.config.delegation_lock_seconds
+        now = time.time()
         d = Delegation(
             delegator=delegator,
             delegate=delegate,
             weight=weight,
-            created_at=time.time(),
-            lock_until=time.time() + lock_s,
+            created_at=now,
+            lock_until=now + lock_s,
         )
         with self._lock:
             self.delegations.append(d)
@@ -491,10 +581,11 @@ class GovernanceDAO:
                 return True
         return False
 
-    def _voting_power(self, voter: str) -> int:
+    def _voting_power(self, voter: str, now: Optional[float] = None) -> int:
         """Compute effective voting power = own balance + delegated weight."""
         own = self.token_holders.get(voter, 1)
-        now = time.time()
+        if now is None:
+            now = time.time()
         incoming = sum(d.weight for d in self.delegations if d.delegate == voter and d.is_active(now))
         return own + incoming
 
@@ -514,6 +605,9 @@ class GovernanceDAO:
             raise ValueError("title_and_description_required")
         if self.token_holders.get(proposer, 0) < self.config.min_proposer_balance:
             raise ValueError("insufficient_proposer_balance")
+        actions = list(actions or [])
+        for action in actions:
+            self._parse_action(action)
         now = time.time()
         p = ProposalV2(
             proposal_id=self._next_id,
@@ -523,7 +617,7 @@ class GovernanceDAO:
             category=category,
             state=ProposalState.DRAFT,
             created_at=now,
-            actions=list(actions or []),
+            actions=actions,
             quorum=quorum if quorum is not None else self.config.default_quorum,
             pass_threshold=pass_threshold if pass_threshold is not None else self.config.pass_threshold,
             metadata=dict(metadata or {}),
@@ -531,15 +625,26 @@ class GovernanceDAO:
         with self._lock:
             self._next_id += 1
             self.proposals[p.proposal_id] = p
+            self._by_state[p.state].add(p.proposal_id)
         self.audit.append("proposal_created", proposer, proposal_id=p.proposal_id, **{"title": title})
         return p
 
+    def _parse_action(self, action: ProposalAction) -> None:
+        """Coerce ``action.payload`` into the handler's typed params up front."""
+        parse = getattr(self._handlers.get(action.kind), "parse", None)
+        if parse is None or action.params is not None:
+            return
+        try:
+            action.params = parse(action.payload)
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"invalid_payload:{action.kind}") from exc
+
     def submit(self, proposal_id: int) -> ProposalV2:
         p = self._get(proposal_id)
         if p.state != ProposalState.DRAFT:
             raise ValueError(f"invalid_state:{p.state}")
         now = time.time()
-        p.state = ProposalState.SUBMITTED
+        self._set_state(p, ProposalState.SUBMITTED)
         p.submitted_at = now
         p.voting_starts_at = now + self.config.voting_delay_seconds
         p.voting_ends_at = p.voting_starts_at + self.config.voting_period_seconds
@@ -552,7 +657,7 @@ class GovernanceDAO:
             raise ValueError(f"invalid_state:{p.state}")
         if p.voting_starts_at is None or p.voting_starts_at > time.time():
             raise ValueError("voting_not_open_yet")
-        p.state = ProposalState.VOTING
+        self._set_state(p, ProposalState.VOTING)
         self.audit.append("voting_started", p.proposer, proposal_id=proposal_id)
         return p
 
@@ -562,7 +667,7 @@ class GovernanceDAO:
             raise ValueError("cannot_cancel_after_queue")
         if actor != p.proposer and actor != "dao":
             raise ValueError("only_proposer_or_dao_can_cancel")
-        p.state = ProposalState.CANCELED
+        self._set_state(p, ProposalState.CANCELED)
         self.audit.append("proposal_canceled", actor, proposal_id=proposal_id)
         return p
 
@@ -575,38 +680,36 @@ class GovernanceDAO:
         p = self._get(proposal_id)
         if p.state != ProposalState.VOTING:
             raise ValueError(f"voting_closed:{p.state}")
+        now = time.time()
         # ``voting_ends_at`` is informational when ``voting_period_seconds`` is
         # 0 (the test path) - we still want votes to go through. The hard
         # cutoff only applies when the period is strictly positive.
         if (
             self.config.voting_period_seconds > 0
             and p.voting_ends_at is not None
-            and p.voting_ends_at < time.time()
+            and p.voting_ends_at < now
         ):
             self._tally(p)
             raise ValueError("voting_period_ended")
         if choice not in ("for", "against", "abstain"):
             raise ValueError("invalid_choice")
-        # 1-voter-1-vote: if this voter already voted, replace.
-        existing = next((v for v in p.votes if v.voter == voter), None)
-        if existing is not None:
-            p.votes.remove(existing)
         # Reconstruct the delegation chain so the audit shows
         # provenance.
         chain = [
             d.delegator
             for d in self.delegations
-            if d.delegate == voter and d.is_active(time.time())
+            if d.delegate == voter and d.is_active(now)
         ]
-        weight = self._voting_power(voter)
+        weight = self._voting_power(voter, now)
         v = Vote(
             voter=voter,
             weight=weight,
             choice=choice,
-            timestamp=time.time(),
+            timestamp=now,
             delegated_from=chain,
         )
-        p.votes.append(v)
+        # 1-voter-1-vote: if this voter already voted, replace.
+        p.add_vote(v)
         self.audit.append(
             "vote_cast",
             voter,
@@ -636,16 +739,17 @@ class GovernanceDAO:
         p = self._get(proposal_id)
         if p.state != ProposalState.VOTING:
             raise ValueError(f"invalid_state:{p.state}")
-        if p.voting_ends_at is not None and p.voting_ends_at > time.time():
+        now = time.time()
+        if p.voting_ends_at is not None and p.voting_ends_at > now:
             raise ValueError("voting_still_open")
         t = self._tally(p)
         if t["quorum_ok"] and t["pass_ratio"] > p.pass_threshold:
-            p.state = ProposalState.QUEUED
-            p.queued_at = time.time()
+            self._set_state(p, ProposalState.QUEUED)
+            p.queued_at = now
             p.executable_at = p.queued_at + self.config.execution_delay_seconds
             self.audit.append("proposal_queued", "dao", proposal_id=proposal_id, **t)
         else:
-            p.state = ProposalState.REJECTED
+            self._set_state(p, ProposalState.REJECTED)
             self.audit.append("proposal_rejected", "dao", proposal_id=proposal_id, **t)
         return p
 
@@ -654,7 +758,7 @@ class GovernanceDAO:
         if p.state == ProposalState.QUEUED:
             if p.executable_at is None or p.executable_at > time.time():
                 raise ValueError("timelock_active")
-            p.state = ProposalState.EXECUTABLE
+            self._set_state(p, ProposalState.EXECUTABLE)
         if p.state != ProposalState.EXECUTABLE:
             raise ValueError(f"invalid_state:{p.state}")
         results: List[Dict[str, Any]] = []
@@ -668,18 +772,29 @@ class GovernanceDAO:
             except Exception as exc:
                 out = {"action_kind": action.kind, "executed": False, "error": str(exc)}
             results.append({"action_kind": action.kind, **out})
-        p.state = ProposalState.EXECUTED
+        self._set_state(p, ProposalState.EXECUTED)
         p.executed_at = time.time()
         self.audit.append("proposal_executed", "dao", proposal_id=proposal_id, results=results)
         return {"proposal_id": proposal_id, "results": results}
 
+    def _set_state(self, p: ProposalV2, state: ProposalState) -> None:
+        with self._lock:
+            self._by_state[p.state].discard(p.proposal_id)
+            self._by_state[state].add(p.proposal_id)
+            p.state = state
+
     def list_proposals(self, state: Optional[ProposalState] = None) -> List[ProposalV2]:
         with self._lock:
-            props = list(self.proposals.values())
-        if state is not None:
-            props = [p for p in props if p.state == state]
+            if state is None:
+                props = list(self.proposals.values())
+            else:
+                props = [self.proposals[pid] for pid in self._by_state[state]]
         return sorted(props, key=lambda p: p.created_at, reverse=True)
 
+    def state_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {state.value: len(ids) for state, ids in self._by_state.items() if ids}
+
     def get_proposal(self, proposal_id: int) -> Optional[ProposalV2]:
         return self.proposals.get(proposal_id)
 
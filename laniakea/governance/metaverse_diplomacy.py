@@ -8,13 +8,16 @@ allowing SCDAs to form alliances, negotiate treaties, and engage in
 collaborative governance.
 """
 
+import heapq
+import itertools
 import logging
+import sys
 import threading
-from typing import Dict, List, Any, Optional, Tuple
+import time
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+from collections import defaultdict
 from dataclasses import dataclass, field
 from datetime import datetime
-import uuid
-import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -33,9 +36,26 @@ class Alliance:
     name: str
     founder_scda_id: str
     members: List[str]
-    creation_date: str
+    created_at: float  # POSIX timestamp; formatted only when serialized
     shared_knowledge_vector: List[float]
     reputation_score: float = 0.0
+    # Running sum / count of the member vectors behind ``shared_knowledge_vector``
+    # so a new member updates the average in O(1) without re-deriving the sum.
+    _knowledge_sum: List[float] = field(default_factory=list, init=False, repr=False, compare=False)
+    _knowledge_count: int = field(default=0, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._knowledge_count = len(self.members)
+        self._knowledge_sum = [float(x) * self._knowledge_count for x in self.shared_knowledge_vector]
+
+    def add_knowledge(self, vector: List[float]) -> None:
+        self._knowledge_sum = [total + x for total, x in zip(self._knowledge_sum, vector)]
+        self._knowledge_count += 1
+        self.shared_knowledge_vector = [total / self._knowledge_count for total in self._knowledge_sum]
+
+    @property
+    def creation_date(self) -> str:
+        return datetime.fromtimestamp(self.created_at).isoformat()
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -52,12 +72,48 @@ class Alliance:
 class Treaty:
     """Represents a formal agreement between two or more SCDAs/Alliances."""
     treaty_id: str
-    parties: List[str] # List of SCDA IDs or Alliance IDs
+    parties: Tuple[str, ...] # SCDA IDs or Alliance IDs
     type: str # e.g., "Knowledge_Sharing", "Defense_Pact", "Resource_Allocation"
     terms: str
-    creation_date: str
+    created_at: float  # POSIX timestamp; formatted only when serialized
     expiration_date: Optional[str] = None
     status: str = "active" # "active", "violated", "expired"
+    # ``expiration_date`` parsed once into a POSIX timestamp (None = never expires)
+    _expiry_ts: Optional[float] = field(default=None, init=False, repr=False, compare=False)
+    # ``parties`` as a frozenset for O(1) membership checks
+    _parties_set: frozenset = field(default=frozenset(), init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._parties_set = frozenset(self.parties)
+        if self.expiration_date:
+            try:
+                self._expiry_ts = datetime.fromisoformat(self.expiration_date).timestamp()
+            except ValueError:
+                logger.warning(f"Treaty {self.treaty_id} has an unparseable expiration date: {self.expiration_date!r}")
+
+    def has_party(self, party_id: str) -> bool:
+        return party_id in self._parties_set
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        if self._expiry_ts is None:
+            return False
+        return (time.time() if now is None else now) > self._expiry_ts
+
+    @property
+    def creation_date(self) -> str:
+        return datetime.fromtimestamp(self.created_at).isoformat()
+
+    def to_dict(self, now: Optional[float] = None) -> Dict[str, Any]:
+        return {
+            "treaty_id": self.treaty_id,
+            "parties": list(self.parties),
+            "type": self.type,
+            "terms": self.terms,
+            "creation_date": self.creation_date,
+            "expiration_date": self.expiration_date,
+            "status": self.status,
+            "expired": self.is_expired(now),
+        }
 
 # --- Core Logic ---
 
@@ -67,11 +123,21 @@ class DiplomacySystem:
     def __init__(self):
         self.alliances: Dict[str, Alliance] = {}
         self.treaties: Dict[str, Treaty] = {}
+        # party id -> {treaty_id: treaty}, in creation order
+        self.treaties_by_party: Dict[str, Dict[str, Treaty]] = defaultdict(dict)
+        # member id -> id of the first alliance it joined (flat lookup for get_alliance_by_member)
+        self._alliance_by_member: Dict[str, str] = {}
+        # min-heap of (expiry_ts, treaty_id) for treaties with an expiration date
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._id_counter = itertools.count(1)
+        # Guards every mutation of the registries above; reads take a
+        # snapshot under the lock and do their work outside it.
+        self._lock = threading.RLock()
         logger.info("DiplomacySystem initialized.")
     
     def _generate_id(self, prefix: str) -> str:
-        """Generates a unique ID."""
-        return f"{prefix}-{uuid.uuid4().hex[:8]}"
+        """Generates a unique ID (process-local monotonic counter)."""
+        return f"{prefix}-{next(self._id_counter):08x}"
     
     def create_alliance(
         self,
@@ -93,109 +159,111 @@ class DiplomacySystem:
             The newly created Alliance object.
         """
         alliance_id = self._generate_id("ALLIANCE")
+        # Ids are interned: they key several indexes, so equal ids share one object
+        founder_scda_id = sys.intern(founder_scda_id)
+        initial_members = [sys.intern(member) for member in initial_members]
         
-        # Calculate initial shared knowledge vector (average of members)
-        vectors = [np.array(v) for v in initial_knowledge_vectors.values()]
-        if not vectors:
-            shared_knowledge = np.zeros(8).tolist()
+        # Calculate initial shared knowledge vector (average of the 8D member vectors)
+        vectors = [v for v in initial_knowledge_vectors.values() if len(v) == 8]
+        if vectors:
+            knowledge_sum = [float(sum(column)) for column in zip(*vectors)]
+            shared_knowledge = [total / len(vectors) for total in knowledge_sum]
         else:
-            # Ensure all vectors are 8D
-            vectors = [v for v in vectors if len(v) == 8]
-            if not vectors:
-                shared_knowledge = np.zeros(8).tolist()
-            else:
-                shared_knowledge = np.mean(vectors, axis=0).tolist()
+            knowledge_sum = [0.0] * 8
+            shared_knowledge = [0.0] * 8
             
         alliance = Alliance(
             alliance_id=alliance_id,
             name=name,
             founder_scda_id=founder_scda_id,
             members=initial_members,
-            creation_date=datetime.now().isoformat(),
+            created_at=time.time(),
             shared_knowledge_vector=shared_knowledge,
             reputation_score=1.0 # Start with a neutral/good reputation
         )
+        alliance._knowledge_sum = knowledge_sum
+        alliance._knowledge_count = len(vectors)
         
-        self.alliances[alliance_id] = alliance
+        with self._lock:
+            self.alliances[alliance_id] = alliance
+            for member in initial_members:
+                self._alliance_by_member.setdefault(member, alliance_id)
         logger.info(f"Alliance '{name}' ({alliance_id}) created by {founder_scda_id}.")
         return alliance
 
     def add_member_to_alliance(self, alliance_id: str, scda_id: str, scda_knowledge_vector: List[float]) -> Alliance:
         """Adds an SCDA to an existing alliance and updates the shared knowledge."""
-        if alliance_id not in self.alliances:
-            raise ValueError(f"Alliance {alliance_id} not found.")
-        
-        alliance = self.alliances[alliance_id]
-        if scda_id in alliance.members:
-            raise ValueError(f"SCDA {scda_id} is already a member of {alliance.name}.")
-            
-        alliance.members.append(scda_id)
-        
-        # Update shared knowledge vector (simple average update)
-        current_members_count = len(alliance.members) - 1
-        current_vector = np.array(alliance.shared_knowledge_vector)
-        new_member_vector = np.array(scda_knowledge_vector)
-        
+        scda_id = sys.intern(scda_id)
+        new_member_vector = [float(x) for x in scda_knowledge_vector]
+
         # Ensure new member vector is 8D
         if len(new_member_vector) != 8:
             raise ValueError("SCDA knowledge vector must be 8-dimensional.")
-        
-        # New average = (Old Sum + New Vector) / New Count
-        # Note: This assumes the current_vector is the average of the *previous* members.
-        # To correctly update the average:
-        # Sum_new = Sum_old + Vector_new
-        # Avg_new = Sum_new / Count_new
-        
-        # Calculate the sum of previous members' vectors
-        sum_old = current_vector * current_members_count
-        
-        # Calculate the new sum
-        sum_new = sum_old + new_member_vector
-        
-        # Calculate the new average
-        alliance.shared_knowledge_vector = (sum_new / len(alliance.members)).tolist()
+
+        with self._lock:
+            if alliance_id not in self.alliances:
+                raise ValueError(f"Alliance {alliance_id} not found.")
+
+            alliance = self.alliances[alliance_id]
+            if scda_id in alliance.members:
+                raise ValueError(f"SCDA {scda_id} is already a member of {alliance.name}.")
+
+            alliance.members.append(scda_id)
+            self._alliance_by_member.setdefault(scda_id, alliance_id)
+
+            # New average = (running sum + new vector) / (running count + 1)
+            alliance.add_knowledge(new_member_vector)
         
         logger.info(f"SCDA {scda_id} joined Alliance {alliance.name}. Shared knowledge updated.")
         return alliance
 
     def create_treaty(
         self,
-        parties: List[str],
+        parties: Sequence[str],
         type: str,
         terms: str,
         expiration_date: Optional[str] = None
     ) -> Treaty:
         """Creates a new treaty between parties."""
         treaty_id = self._generate_id("TREATY")
+        treaty_parties = tuple(sys.intern(party) for party in parties)
         
         # Basic validation: ensure parties exist (SCDA or Alliance)
         # In a real system, we'd check a global SCDA/Alliance registry
         
         treaty = Treaty(
             treaty_id=treaty_id,
-            parties=parties,
+            parties=treaty_parties,
             type=type,
             terms=terms,
-            creation_date=datetime.now().isoformat(),
+            created_at=time.time(),
             expiration_date=expiration_date
         )
         
-        self.treaties[treaty_id] = treaty
-        logger.info(f"Treaty '{type}' ({treaty_id}) created between {', '.join(parties)}.")
+        with self._lock:
+            self.treaties[treaty_id] = treaty
+            for party in treaty_parties:
+                self.treaties_by_party[party][treaty_id] = treaty
+            if treaty._expiry_ts is not None:
+                heapq.heappush(self._expiry_heap, (treaty._expiry_ts, treaty_id))
+        logger.info(f"Treaty '{type}' ({treaty_id}) created between {', '.join(treaty_parties)}.")
         return treaty
 
     def violate_treaty(self, treaty_id: str, violating_party: str, penalty: float) -> Treaty:
         """Marks a treaty as violated and applies a penalty (e.g., reputation loss)."""
-        if treaty_id not in self.treaties:
-            raise ValueError(f"Treaty {treaty_id} not found.")
-        
-        treaty = self.treaties[treaty_id]
-        treaty.status = "violated"
-        
-        # Apply penalty to the violating party's reputation (if Alliance)
-        if violating_party.startswith("ALLIANCE-") and violating_party in self.alliances:
-            alliance = self.alliances[violating_party]
-            alliance.reputation_score = max(0.0, alliance.reputation_score - penalty)
+        with self._lock:
+            if treaty_id not in self.treaties:
+                raise ValueError(f"Treaty {treaty_id} not found.")
+
+            treaty = self.treaties[treaty_id]
+            treaty.status = "violated"
+
+            # Apply penalty to the violating party's reputation (if Alliance)
+            alliance = None
+            if violating_party.startswith("ALLIANCE-") and violating_party in self.alliances:
+                alliance = self.alliances[violating_party]
+                alliance.reputation_score = max(0.0, alliance.reputation_score - penalty)
+        if alliance is not None:
             logger.warning(f"Alliance {alliance.name} violated Treaty {treaty_id}. Reputation reduced by {penalty}.")
         
         logger.warning(f"Treaty {treaty_id} violated by {violating_party}.")
@@ -209,10 +277,27 @@ class DiplomacySystem:
 
     def get_alliance_by_member(self, scda_id: str) -> Optional[Alliance]:
         """Finds the alliance an SCDA belongs to."""
-        for alliance in self.alliances.values():
-            if scda_id in alliance.members:
-                return alliance
-        return None
+        alliance_id = self._alliance_by_member.get(scda_id)
+        return self.alliances.get(alliance_id) if alliance_id is not None else None
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """Marks every active treaty whose expiration date has passed as expired.
+
+        Pops due entries off the expiry heap, so each treaty is visited once
+        over its lifetime. Returns the number of treaties transitioned.
+        """
+        now = time.time() if now is None else now
+        expired = 0
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] < now:
+                _, treaty_id = heapq.heappop(self._expiry_heap)
+                treaty = self.treaties.get(treaty_id)
+                if treaty is not None and treaty.status == "active":
+                    treaty.status = "expired"
+                    expired += 1
+        if expired:
+            logger.info(f"{expired} treaties expired.")
+        return expired
 
 
 # --- Singleton accessor ---------------------------------------------------
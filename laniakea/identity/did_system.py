@@ -4,14 +4,26 @@ Laniakea Protocol - Decentralized Identity System
 """
 
 import hashlib
+import heapq
 import json
+import logging
+import os
+from array import array
+import sys
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from collections.abc import Set as AbstractSet
+from operator import attrgetter, itemgetter
+from dataclasses import dataclass, field
 from time import time
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Callable, Dict, List, Optional, Set, Tuple
 from enum import Enum
-from pydantic import BaseModel, Field
+import numpy as np
 from cryptography.hazmat.primitives.asymmetric import ec
 from cryptography.hazmat.primitives import serialization, hashes
 
+logger = logging.getLogger(__name__)
+
 
 class CredentialType(str, Enum):
     """نوع اعتبارنامه"""
@@ -32,8 +44,9 @@ class VerificationStatus(str, Enum):
     REVOKED = "revoked"
 
 
-class Credential(BaseModel):
-    """اعتبارنامه"""
+@dataclass(slots=True, kw_only=True)
+class Credential:
+    """اعتبارنامه (اعتبارسنجی ورودی در مرز IdentityManager انجام می‌شود)"""
 
     id: str
     holder_did: str  # DID دارنده
@@ -43,11 +56,11 @@ class Credential(BaseModel):
     # محتوا
     title: str
     description: str
-    data: Dict = Field(default_factory=dict)
+    data: Dict = field(default_factory=dict)
 
     # تأیید
     status: VerificationStatus = VerificationStatus.PENDING
-    verifiers: List[str] = Field(default_factory=list)
+    verifiers: Set[str] = field(default_factory=set)
 
     # زمان
     issued_at: float
@@ -58,22 +71,23 @@ class Credential(BaseModel):
     proof: Optional[Dict] = None
 
 
-class DIDDocument(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class DIDDocument:
     """سند هویت غیرمتمرکز"""
 
     did: str  # Decentralized Identifier
 
     # کلیدهای عمومی
-    public_keys: List[Dict] = Field(default_factory=list)
+    public_keys: List[Dict] = field(default_factory=list)
 
     # روش‌های احراز هویت
-    authentication: List[str] = Field(default_factory=list)
+    authentication: List[str] = field(default_factory=list)
 
     # سرویس‌ها
-    services: List[Dict] = Field(default_factory=list)
+    services: List[Dict] = field(default_factory=list)
 
     # اعتبارنامه‌ها
-    credentials: List[str] = Field(default_factory=list)
+    credentials: List[str] = field(default_factory=list)
 
     # متادیتا
     created: float
@@ -81,7 +95,37 @@ class DIDDocument(BaseModel):
 
     # اعتماد
     reputation_score: float = 0.0
-    trust_network: List[str] = Field(default_factory=list)
+    # نمای فقط‌خواندنی روی trust_graph[did]؛ تغییر فقط از طریق IdentityManager.add_trust
+    trust_network: AbstractSet[str] = field(default_factory=frozenset)
+
+
+class _ReadOnlySet(AbstractSet):
+    """نمای فقط‌خواندنی یک set (بدون کپی؛ تغییرات مجموعه اصلی دیده می‌شود)"""
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: Set[str]):
+        self._data = data
+
+    def __contains__(self, item) -> bool:
+        return item in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._data!r})"
+
+
+# حداکثر تعداد جفت‌های کش‌شده امتیاز اعتماد
+TRUST_CACHE_SIZE = 100_000
+
+# نیمه‌عمر تقریبی وزن زمانی فعالیت‌ها در محاسبه reputation (۳۰ روز)
+REPUTATION_DECAY_SECONDS = 30 * 24 * 3600
+_NO_CACHED_PATH = object()
 
 
 class IdentityManager:
@@ -98,7 +142,21 @@ class IdentityManager:
         # شبکه اعتماد
         self.trust_graph: Dict[str, Set[str]] = {}
 
-        print("🆔 Identity Manager initialized")
+        # کش بخش گرافی امتیاز اعتماد: (did, target) -> امتیاز یا None (بدون مسیر)
+        # با هر تغییر trust_graph (add_trust و create_identity) خالی می‌شود
+        self._trust_path_cache: Dict[Tuple[str, str], Optional[float]] = {}
+
+        # ایندکس معکوس: نوع اعتبارنامه -> DID دارندگان
+        self.holders_by_type: Dict[CredentialType, Set[str]] = defaultdict(set)
+
+        # هویت‌ها مرتب بر اساس reputation به صورت (-score, did)؛ با set_reputation به‌روز می‌شود
+        self._by_reputation: List[Tuple[float, str]] = []
+
+        # flush های ثبت‌شده توسط ReputationSystem؛ پیش از هر خواندن reputation اجرا می‌شوند
+        # تا امتیازهای معوق (فعالیت‌های محاسبه‌نشده) اعمال شوند
+        self._reputation_flushers: List[Callable[[], None]] = []
+
+        logger.info("🆔 Identity Manager initialized")
 
     def create_identity(self, node_id: str, public_key: str) -> DIDDocument:
         """
@@ -111,8 +169,8 @@ class IdentityManager:
         Returns:
             سند DID
         """
-        # ایجاد DID
-        did = f"did:laniakea:{node_id}"
+        # ایجاد DID (intern شده تا کلیدهای دیکشنری‌ها یک شیء مشترک باشند)
+        did = sys.intern(f"did:laniakea:{node_id}")
 
         # ایجاد سند
         doc = DIDDocument(
@@ -128,11 +186,19 @@ class IdentityManager:
             created=time(),
             updated=time(),
         )
+        # trust_network سند نمای همان مجموعه گراف است (بدون نسخه تکراری)
+        edges: Set[str] = set()
+        doc.trust_network = _ReadOnlySet(edges)
 
+        previous = self.identities.get(did)
+        self._reindex_reputation(
+            did, previous.reputation_score if previous else None, doc.reputation_score
+        )
         self.identities[did] = doc
-        self.trust_graph[did] = set()
+        self.trust_graph[did] = edges
+        self._trust_path_cache.clear()
 
-        print(f"✨ Identity created: {did}")
+        logger.debug("✨ Identity created: %s", did)
         return doc
 
     def issue_credential(
@@ -160,15 +226,17 @@ class IdentityManager:
         Returns:
             اعتبارنامه
         """
-        # ایجاد شناسه
-        cred_id = hashlib.sha256(f"{issuer_did}{holder_did}{title}{time()}".encode()).hexdigest()
+        # ایجاد شناسه (BLAKE2b-128 با salt تصادفی؛ شناسه است نه امضا)
+        cred_id = hashlib.blake2b(
+            f"{issuer_did}|{holder_did}|{title}".encode(), digest_size=16, salt=os.urandom(16)
+        ).hexdigest()
 
         # ایجاد اعتبارنامه
         credential = Credential(
             id=cred_id,
             holder_did=holder_did,
             issuer_did=issuer_did,
-            credential_type=credential_type,
+            credential_type=CredentialType(credential_type),
             title=title,
             description=description,
             data=data or {},
@@ -182,8 +250,9 @@ class IdentityManager:
         # افزودن به DID دارنده
         if holder_did in self.identities:
             self.identities[holder_did].credentials.append(cred_id)
+            self.holders_by_type[credential.credential_type].add(holder_did)
 
-        print(f"📜 Credential issued: {title} to {holder_did}")
+        logger.debug("📜 Credential issued: %s to %s", title, holder_did)
         return credential
 
     def verify_credential(self, credential_id: str, verifier_did: str) -> bool:
@@ -202,19 +271,19 @@ class IdentityManager:
 
         credential = self.credentials[credential_id]
 
-        # افزودن تأییدکننده
-        if verifier_did not in credential.verifiers:
-            credential.verifiers.append(verifier_did)
+        # افزودن تأییدکننده (مجموعه؛ تکراری‌ها خودبه‌خود حذف می‌شوند)
+        credential.verifiers.add(verifier_did)
 
         # اگر تعداد کافی تأییدکننده داشت
         if len(credential.verifiers) >= 3:
             credential.status = VerificationStatus.VERIFIED
 
             # افزایش reputation
-            if credential.holder_did in self.identities:
-                self.identities[credential.holder_did].reputation_score += 10.0
+            holder = self.identities.get(credential.holder_did)
+            if holder is not None:
+                self.set_reputation(holder.did, holder.reputation_score + 10.0)
 
-        print(f"✅ Credential verified by {verifier_did}")
+        logger.debug("✅ Credential verified by %s", verifier_did)
         return True
 
     def revoke_credential(self, credential_id: str, issuer_did: str) -> bool:
@@ -229,22 +298,16 @@ class IdentityManager:
 
         credential.status = VerificationStatus.REVOKED
 
-        print(f"🚫 Credential revoked: {credential_id[:12]}")
+        logger.debug("🚫 Credential revoked: %.12s", credential_id)
         return True
 
     def add_trust(self, from_did: str, to_did: str):
         """افزودن رابطه اعتماد"""
-        if from_did not in self.trust_graph:
-            self.trust_graph[from_did] = set()
-
-        self.trust_graph[from_did].add(to_did)
+        # trust_network هویت‌ها نمای همان مجموعه‌های trust_graph است و جداگانه به‌روز نمی‌شود
+        self.trust_graph.setdefault(from_did, set()).add(to_did)
+        self._trust_path_cache.clear()
 
-        # افزودن به trust network
-        if from_did in self.identities:
-            if to_did not in self.identities[from_did].trust_network:
-                self.identities[from_did].trust_network.append(to_did)
-
-        print(f"🤝 Trust added: {from_did} -> {to_did}")
+        logger.debug("🤝 Trust added: %s -> %s", from_did, to_did)
 
     def calculate_trust_score(self, did: str, target_did: str) -> float:
         """
@@ -262,6 +325,49 @@ class IdentityManager:
         if did == target_did:
             return 1.0
 
+        key = (did, target_did)
+        score = self._trust_path_cache.get(key, _NO_CACHED_PATH)
+        if score is _NO_CACHED_PATH:
+            if len(self._trust_path_cache) >= TRUST_CACHE_SIZE:
+                self._trust_path_cache.clear()
+            score = self._trust_path_cache[key] = self._trust_path_score(did, target_did)
+        if score is not None:
+            return score
+
+        # بر اساس reputation (همیشه تازه محاسبه می‌شود چون reputation مستقل از گراف تغییر می‌کند)
+        if target_did in self.identities:
+            self._sync_reputation()
+            rep = self.identities[target_did].reputation_score
+            return min(rep / 100.0, 0.5)
+
+        return 0.0
+
+    def set_reputation(self, did: str, score: float):
+        """تنظیم امتیاز شهرت یک هویت (ایندکس مرتب هم‌زمان به‌روز می‌شود)"""
+        doc = self.identities.get(did)
+        if doc is None:
+            return
+        self._reindex_reputation(did, doc.reputation_score, score)
+        doc.reputation_score = score
+
+    def _reindex_reputation(self, did: str, old: Optional[float], new: float):
+        if old is not None:
+            i = bisect_left(self._by_reputation, (-old, did))
+            if i < len(self._by_reputation) and self._by_reputation[i] == (-old, did):
+                del self._by_reputation[i]
+        insort(self._by_reputation, (-new, did))
+
+    def _sync_reputation(self):
+        for flush in self._reputation_flushers:
+            flush()
+
+    def top_by_reputation(self, limit: int) -> List[Tuple[str, float]]:
+        """برترین هویت‌ها بر اساس reputation به صورت (DID, امتیاز) در O(limit)"""
+        self._sync_reputation()
+        return [(did, -neg_score) for neg_score, did in self._by_reputation[:limit]]
+
+    def _trust_path_score(self, did: str, target_did: str) -> Optional[float]:
+        """امتیاز اعتماد از مسیر مستقیم یا یک‌درجه در گراف؛ None اگر مسیری نباشد"""
         # اعتماد مستقیم
         if did in self.trust_graph and target_did in self.trust_graph[did]:
             return 0.9
@@ -275,15 +381,11 @@ class IdentityManager:
                 ):
                     return 0.7
 
-        # بر اساس reputation
-        if target_did in self.identities:
-            rep = self.identities[target_did].reputation_score
-            return min(rep / 100.0, 0.5)
-
-        return 0.0
+        return None
 
     def get_identity(self, did: str) -> Optional[DIDDocument]:
         """دریافت سند هویت"""
+        self._sync_reputation()
         return self.identities.get(did)
 
     def get_credentials(self, did: str) -> List[Credential]:
@@ -295,36 +397,37 @@ class IdentityManager:
         return [self.credentials[cid] for cid in cred_ids if cid in self.credentials]
 
     def search_identities(
-        self, credential_type: Optional[CredentialType] = None, min_reputation: float = 0.0
+        self,
+        credential_type: Optional[CredentialType] = None,
+        min_reputation: float = 0.0,
+        limit: Optional[int] = None,
     ) -> List[DIDDocument]:
-        """جستجوی هویت‌ها"""
-        results = []
-
-        for did, doc in self.identities.items():
-            # فیلتر reputation
-            if doc.reputation_score < min_reputation:
-                continue
-
-            # فیلتر نوع اعتبارنامه
-            if credential_type:
-                has_type = False
-                for cred_id in doc.credentials:
-                    if cred_id in self.credentials:
-                        if self.credentials[cred_id].credential_type == credential_type:
-                            has_type = True
-                            break
-                if not has_type:
-                    continue
-
-            results.append(doc)
-
-        # مرتب‌سازی بر اساس reputation
-        results.sort(key=lambda d: d.reputation_score, reverse=True)
+        """جستجوی هویت‌ها (مرتب بر اساس reputation، حداکثر limit نتیجه)"""
+        self._sync_reputation()
+        if not credential_type:
+            # بدون فیلتر نوع: پیشوند ایندکس مرتب تا مرز min_reputation (با bisect)
+            end = bisect_right(self._by_reputation, -min_reputation, key=itemgetter(0))
+            if limit is not None:
+                end = min(end, limit)
+            return [self.identities[did] for _, did in self._by_reputation[:end]]
+
+        # فیلتر نوع اعتبارنامه از ایندکس معکوس (فقط دارندگان همان نوع بررسی می‌شوند)
+        candidates = (self.identities[did] for did in self.holders_by_type.get(credential_type, ()))
+
+        # فیلتر reputation
+        results = [doc for doc in candidates if doc.reputation_score >= min_reputation]
+
+        # مرتب‌سازی بر اساس reputation؛ با limit فقط top-K با heap انتخاب می‌شود
+        score = attrgetter("reputation_score")
+        if limit is not None:
+            return heapq.nlargest(limit, results, key=score)
+        results.sort(key=score, reverse=True)
 
         return results
 
     def get_stats(self) -> Dict:
         """آمار سیستم هویت"""
+        self._sync_reputation()
         return {
             "total_identities": len(self.identities),
             "total_credentials": len(self.credentials),
@@ -349,11 +452,20 @@ class ReputationSystem:
 
     def __init__(self, identity_manager: IdentityManager):
         self.identity_manager = identity_manager
+        identity_manager._reputation_flushers.append(self.flush)
 
         # تاریخچه فعالیت
         self.activity_history: Dict[str, List[Dict]] = {}
 
-        print("⭐ Reputation System initialized")
+        # ستون‌های عددی (timestamp، value) همان تاریخچه برای محاسبه برداری reputation
+        self._activity_ts: Dict[str, array] = defaultdict(lambda: array("d"))
+        self._activity_val: Dict[str, array] = defaultdict(lambda: array("d"))
+
+        # DIDهایی که فعالیت جدید دارند و reputation آن‌ها هنوز محاسبه نشده
+        # (محاسبه تا اولین خواندن به تعویق می‌افتد)
+        self._dirty: Set[str] = set()
+
+        logger.info("⭐ Reputation System initialized")
 
     def record_activity(self, did: str, activity_type: str, value: float, metadata: Dict = None):
         """
@@ -376,9 +488,30 @@ class ReputationSystem:
         }
 
         self.activity_history[did].append(activity)
+        self._activity_ts[did].append(activity["timestamp"])
+        self._activity_val[did].append(value)
+
+        # به‌روزرسانی reputation در اولین خواندن (flush)
+        self._dirty.add(did)
+
+    def flush(self):
+        """محاسبه reputation برای همه DIDهای دارای فعالیت معوق"""
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, set()
+        for did in dirty:
+            self._update_reputation(did)
+
+    def _refresh(self, did: str):
+        if did in self._dirty:
+            self._dirty.discard(did)
+            self._update_reputation(did)
 
-        # به‌روزرسانی reputation
-        self._update_reputation(did)
+    def get_reputation(self, did: str) -> float:
+        """امتیاز شهرت به‌روز یک DID"""
+        self._refresh(did)
+        doc = self.identity_manager.get_identity(did)
+        return doc.reputation_score if doc else 0.0
 
     def _update_reputation(self, did: str):
         """به‌روزرسانی امتیاز شهرت"""
@@ -388,23 +521,15 @@ class ReputationSystem:
         if did not in self.activity_history:
             return
 
-        # محاسبه بر اساس فعالیت‌ها
-        activities = self.activity_history[did]
-
-        # وزن‌دهی زمانی (فعالیت‌های جدیدتر وزن بیشتر)
-        now = time()
-        weighted_sum = 0.0
-        total_weight = 0.0
-
-        for activity in activities:
-            age = now - activity["timestamp"]
-            weight = 1.0 / (1.0 + age / (30 * 24 * 3600))  # کاهش با زمان
-            weighted_sum += activity["value"] * weight
-            total_weight += weight
+        # وزن‌دهی زمانی (فعالیت‌های جدیدتر وزن بیشتر) به صورت برداری روی ستون‌ها
+        timestamps = np.frombuffer(self._activity_ts[did])
+        values = np.frombuffer(self._activity_val[did])
+        weights = 1.0 / (1.0 + (time() - timestamps) / REPUTATION_DECAY_SECONDS)  # کاهش با زمان
+        total_weight = float(weights.sum())
 
         if total_weight > 0:
-            reputation = weighted_sum / total_weight
-            self.identity_manager.identities[did].reputation_score = reputation
+            reputation = float(values @ weights) / total_weight
+            self.identity_manager.set_reputation(did, reputation)
 
     def get_leaderboard(self, limit: int = 10) -> List[Tuple[str, float]]:
         """
@@ -416,33 +541,23 @@ class ReputationSystem:
         Returns:
             لیست (DID, reputation)
         """
-        identities = self.identity_manager.identities.values()
-        sorted_identities = sorted(identities, key=lambda d: d.reputation_score, reverse=True)
-
-        return [(d.did, d.reputation_score) for d in sorted_identities[:limit]]
+        return self.identity_manager.top_by_reputation(limit)
 
     def get_reputation_breakdown(self, did: str) -> Dict:
         """تجزیه و تحلیل شهرت"""
+        self._refresh(did)
         if did not in self.activity_history:
             return {}
 
-        activities = self.activity_history[did]
-
-        # گروه‌بندی بر اساس نوع
-        by_type = {}
-        for activity in activities:
-            activity_type = activity["type"]
-            if activity_type not in by_type:
-                by_type[activity_type] = []
-            by_type[activity_type].append(activity["value"])
+        # تجمیع یک‌گذره بر اساس نوع: [تعداد، مجموع] بدون ساختن لیست مقادیر
+        stats = defaultdict(lambda: [0, 0])
+        for activity in self.activity_history[did]:
+            entry = stats[activity["type"]]
+            entry[0] += 1
+            entry[1] += activity["value"]
 
         # محاسبه آمار
-        breakdown = {}
-        for activity_type, values in by_type.items():
-            breakdown[activity_type] = {
-                "count": len(values),
-                "total": sum(values),
-                "average": sum(values) / len(values),
-            }
-
-        return breakdown
+        return {
+            activity_type: {"count": count, "total": total, "average": total / count}
+            for activity_type, (count, total) in stats.items()
+        }
@@ -6,10 +6,16 @@ Laniakea Protocol - AI API Integration
 import os
 import json
 import asyncio
-from typing import Dict, Any, Optional, List
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple
 from enum import Enum
 from datetime import datetime
 
+import numpy as np
+
 try:
     from openai import OpenAI, AsyncOpenAI  # type: ignore
     from openai.types.chat import ChatCompletionMessageParam  # type: ignore
@@ -35,6 +41,167 @@ except Exception as e:
     async_client = None
 
 
+# کش پاسخ‌ها
+LLM_CACHE_SIZE = int(os.getenv("LANIAKEA_LLM_CACHE_SIZE", "1024"))
+# مسیر پیش‌فرض SQLite برای ماندگاری کش پس از راه‌اندازی مجدد؛
+# LANIAKEA_LLM_CACHE_PATH هنگام ساخت کش خوانده می‌شود (رشته خالی = فقط حافظه)
+LLM_CACHE_DEFAULT_PATH = os.path.expanduser("~/.laniakea_llm_cache.sqlite")
+# خروجی با temperature بالاتر تصادفی است و کش نمی‌شود
+LLM_CACHE_MAX_TEMPERATURE = 0.3
+# لایه معنایی برای هر miss یک فراخوانی embedding اضافه دارد؛ پیش‌فرض خاموش
+SEMANTIC_CACHE_ENABLED = os.getenv("LANIAKEA_LLM_SEMANTIC_CACHE", "0") == "1"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("LANIAKEA_LLM_SEMANTIC_THRESHOLD", "0.95"))
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+
+class _ResponseCache:
+    """
+    کش پاسخ LLM
+
+    لایه دقیق: LRU روی هش (model, system_prompt, prompt, temperature, max_tokens)
+    لایه معنایی: شباهت کسینوسی embedding پرامپت با پرامپت‌های کش‌شده همان context
+    ورودی‌ها در صورت امکان در SQLite هم ذخیره می‌شوند.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = LLM_CACHE_SIZE,
+        path: Optional[str] = None,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+    ):
+        if path is None:
+            path = os.getenv("LANIAKEA_LLM_CACHE_PATH", LLM_CACHE_DEFAULT_PATH)
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        # context -> (ماتریس embedding های نرمال‌شده float32، کلیدهای متناظر هر سطر)
+        self._vectors: Dict[str, Tuple[np.ndarray, List[str]]] = {}
+        self._context_of: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._db = self._open(path) if path else None
+
+    @staticmethod
+    def make_key(
+        model: str, system_prompt: Optional[str], prompt: str, temperature: float, max_tokens: int
+    ) -> Tuple[str, str]:
+        """(context, key): context همه ورودی‌ها به جز خود پرامپت است"""
+        context = hashlib.blake2b(
+            f"{model}\x00{system_prompt or ''}\x00{temperature}\x00{max_tokens}".encode(),
+            digest_size=16,
+        ).hexdigest()
+        key = hashlib.blake2b(f"{context}\x00{prompt}".encode(), digest_size=16).hexdigest()
+        return context, key
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            content = self._entries.get(key)
+            if content is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return content
+
+    def get_similar(self, context: str, embedding: Optional[np.ndarray]) -> Optional[str]:
+        """نزدیک‌ترین پاسخ کش‌شده با شباهت کسینوسی حداقل threshold"""
+        if embedding is None:
+            return None
+        with self._lock:
+            matrix, keys = self._vectors.get(context, (None, None))
+            if matrix is None:
+                return None
+            similarities = matrix @ _normalize(embedding)
+            best = int(similarities.argmax())
+            if similarities[best] < self.threshold:
+                return None
+            key = keys[best]
+            self._entries.move_to_end(key)
+            self.semantic_hits += 1
+            return self._entries[key]
+
+    def put(
+        self, key: str, content: str, context: Optional[str] = None, embedding: Optional[np.ndarray] = None
+    ):
+        with self._lock:
+            self._store(key, content, context, embedding)
+            evicted = []
+            while len(self._entries) > self.maxsize:
+                old_key, _ = self._entries.popitem(last=False)
+                self._drop_vector(old_key)
+                evicted.append(old_key)
+            if self._db is not None:
+                blob = _normalize(embedding).tobytes() if embedding is not None else None
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?)",
+                        (key, content, context, blob),
+                    )
+                    self._db.executemany("DELETE FROM llm_cache WHERE key = ?", [(k,) for k in evicted])
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    print(f"⚠️ LLM cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+        }
+
+    def _store(self, key: str, content: str, context: Optional[str], embedding: Optional[np.ndarray]):
+        self._drop_vector(key)
+        self._entries[key] = content
+        self._entries.move_to_end(key)
+        if context is None or embedding is None:
+            return
+        row = _normalize(embedding)[None, :]
+        matrix, keys = self._vectors.get(context, (None, []))
+        if matrix is not None and matrix.shape[1] != row.shape[1]:
+            return  # embedding با بعد متفاوت (مدل دیگر)
+        self._vectors[context] = (row if matrix is None else np.vstack((matrix, row)), keys + [key])
+        self._context_of[key] = context
+
+    def _drop_vector(self, key: str):
+        context = self._context_of.pop(key, None)
+        if context is None:
+            return
+        matrix, keys = self._vectors[context]
+        i = keys.index(key)
+        if len(keys) == 1:
+            del self._vectors[context]
+        else:
+            self._vectors[context] = (np.delete(matrix, i, axis=0), keys[:i] + keys[i + 1 :])
+
+    def _open(self, path: str) -> Optional[sqlite3.Connection]:
+        try:
+            db = sqlite3.connect(path, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache "
+                "(key TEXT PRIMARY KEY, content TEXT NOT NULL, context TEXT, embedding BLOB)"
+            )
+            rows = db.execute(
+                "SELECT key, content, context, embedding FROM llm_cache ORDER BY rowid DESC LIMIT ?",
+                (self.maxsize,),
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"⚠️ LLM cache persistence disabled: {e}")
+            return None
+        for key, content, context, blob in reversed(rows):
+            embedding = np.frombuffer(blob, dtype=np.float32) if blob else None
+            self._store(key, content, context, embedding)
+        return db
+
+
+def _normalize(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
 class LLMProvider(str, Enum):
     """ارائه‌دهندگان LLM"""
 
@@ -51,6 +218,32 @@ class AI_API:
     def __init__(self):
         self.default_model = LLMProvider.GEMINI_FLASH.value
         self.stats = {"total_calls": 0, "last_call": None}
+        self.cache = _ResponseCache()
+        self.semantic_cache = SEMANTIC_CACHE_ENABLED
+
+    def _cache_key(
+        self, prompt: str, system_prompt: Optional[str], model_name: str, max_tokens: int, temperature: float
+    ) -> Optional[Tuple[str, str]]:
+        """کلید کش یا None اگر خروجی این تنظیمات نباید کش شود"""
+        if temperature > LLM_CACHE_MAX_TEMPERATURE:
+            return None
+        return _ResponseCache.make_key(model_name, system_prompt, prompt, temperature, max_tokens)
+
+    def _embed_sync(self, prompt: str) -> Optional[np.ndarray]:
+        try:
+            response = client.embeddings.create(model=EMBEDDING_MODEL, input=prompt)
+            return np.asarray(response.data[0].embedding, dtype=np.float32)
+        except Exception as e:
+            print(f"⚠️ Embedding failed, semantic cache skipped: {e}")
+            return None
+
+    async def _embed_async(self, prompt: str) -> Optional[np.ndarray]:
+        try:
+            response = await async_client.embeddings.create(model=EMBEDDING_MODEL, input=prompt)
+            return np.asarray(response.data[0].embedding, dtype=np.float32)
+        except Exception as e:
+            print(f"⚠️ Embedding failed, semantic cache skipped: {e}")
+            return None
 
     def generate_text_sync(
         self,
@@ -66,11 +259,23 @@ class AI_API:
         if not client:
             return json.dumps({"error": "OpenAI client not initialized"})
 
+        model_name = model if model else self.default_model
+
+        # کش: تطابق دقیق، سپس (در صورت فعال بودن) تطابق معنایی
+        cache_key = self._cache_key(prompt, system_prompt, model_name, max_tokens, temperature)
+        embedding = None
+        if cache_key:
+            context, key = cache_key
+            cached = self.cache.get(key)
+            if cached is None and self.semantic_cache:
+                embedding = self._embed_sync(prompt)
+                cached = self.cache.get_similar(context, embedding)
+            if cached is not None:
+                return cached
+
         self.stats["total_calls"] += 1
         self.stats["last_call"] = datetime.now().isoformat()
 
-        model_name = model if model else self.default_model
-
         messages: List[ChatCompletionMessageParam] = []
 
         if system_prompt:
@@ -87,7 +292,10 @@ class AI_API:
             if content is None:
                 print(f"❌ LLM API Error ({model_name}): Content is None")
                 return json.dumps({"error": "LLM generation failed: Content is None"})
-            return content.strip()
+            content = content.strip()
+            if cache_key:
+                self.cache.put(key, content, context, embedding)
+            return content
 
         except Exception as e:
             print(f"❌ LLM API Error ({model_name}): {e}")
@@ -107,11 +315,23 @@ class AI_API:
         if not async_client:
             return json.dumps({"error": "OpenAI async client not initialized"})
 
+        model_name = model if model else self.default_model
+
+        # کش: تطابق دقیق، سپس (در صورت فعال بودن) تطابق معنایی
+        cache_key = self._cache_key(prompt, system_prompt, model_name, max_tokens, temperature)
+        embedding = None
+        if cache_key:
+            context, key = cache_key
+            cached = self.cache.get(key)
+            if cached is None and self.semantic_cache:
+                embedding = await self._embed_async(prompt)
+                cached = self.cache.get_similar(context, embedding)
+            if cached is not None:
+                return cached
+
         self.stats["total_calls"] += 1
         self.stats["last_call"] = datetime.now().isoformat()
 
-        model_name = model if model else self.default_model
-
         messages: List[ChatCompletionMessageParam] = []
 
         if system_prompt:
@@ -128,7 +348,10 @@ class AI_API:
             if content is None:
                 print(f"❌ LLM API Error ({model_name}): Content is None")
                 return json.dumps({"error": "LLM generation failed: Content is None"})
-            return content.strip()
+            content = content.strip()
+            if cache_key:
+                self.cache.put(key, content, context, embedding)
+            return content
 
         except Exception as e:
             print(f"❌ LLM API Error ({model_name}): {e}")
@@ -136,7 +359,7 @@ class AI_API:
 
     def get_stats(self) -> Dict[str, Any]:
         """دریافت آمار API"""
-        return self.stats
+        return {**self.stats, "cache": self.cache.stats()}
 
 
 # Singleton
@@ -13,6 +13,8 @@ Laniakea Protocol - Enhanced Autonomous AI System v0.0.01
 import asyncio
 import json
 import hashlib
+import heapq
+import time
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Union
 from pathlib import Path
@@ -29,6 +31,25 @@ from laniakea.core.standards import (
     LaniakeaLogger, secure_exception_handler, validate_input,
     sanitize_string, PerformanceMonitor, GLOBAL_SECURITY_CONFIG
 )
+from laniakea.external_apis.api_integrations import TokenBucket
+
+# حداکثر درخواست‌های همزمان در یک چرخه یادگیری
+LEARNING_CONCURRENCY = 8
+# (ظرفیت، توکن در ثانیه) برای هر منبع دانش (جایگزین تاخیر ثابت بین درخواست‌ها)
+SOURCE_RATE_LIMITS = {
+    "wikipedia": (8, 4.0),
+    "arxiv": (4, 1.0),
+}
+
+
+def _short_id(prefix: str, key: Any) -> str:
+    """شناسه کوتاه نود: 16 کاراکتر hex از BLAKE2b-64 (سریع‌تر از sha256 کوتاه‌شده)"""
+    return hashlib.blake2b(f"{prefix}_{key}".encode(), digest_size=8).hexdigest()
+
+
+def _format_ts(ns: Optional[int]) -> Optional[str]:
+    """تبدیل timestamp نانوثانیه‌ای به ISO (فقط هنگام خروجی)"""
+    return datetime.fromtimestamp(ns / 1e9).isoformat() if ns is not None else None
 
 
 class KnowledgeGraph:
@@ -44,6 +65,10 @@ class KnowledgeGraph:
         self.nodes: Dict[str, Dict[str, Any]] = {}
         self.edges: List[Dict[str, Any]] = []
         self.concepts: Dict[str, float] = {}
+
+        # زمان‌ها به صورت time_ns() نگه داشته و فقط در خروجی قالب‌بندی می‌شوند
+        self._epoch_ns = time.time_ns()
+        self._last_update_ns: Optional[int] = None
         
         # استانداردهای امنیتی و مانیتورینگ
         self.logger = LaniakeaLogger("KnowledgeGraph")
@@ -77,10 +102,11 @@ class KnowledgeGraph:
                     raise TypeError("Data must be a dictionary")
                 
                 # ایجاد نود جدید
+                now_ns = self._last_update_ns = time.time_ns()
                 self.nodes[safe_node_id] = {
                     "data": data,
                     "concept": safe_concept,
-                    "timestamp": datetime.now().isoformat(),
+                    "timestamp_ns": now_ns,
                     "connections": 0,
                     "importance": 0.0,
                     "validated": True
@@ -99,13 +125,14 @@ class KnowledgeGraph:
     def add_edge(self, source: str, target: str, relationship: str, strength: float = 1.0):
         """افزودن ارتباط بین دو نود"""
         if source in self.nodes and target in self.nodes:
+            now_ns = self._last_update_ns = time.time_ns()
             self.edges.append(
                 {
                     "source": source,
                     "target": target,
                     "relationship": relationship,
                     "strength": strength,
-                    "timestamp": datetime.now().isoformat(),
+                    "timestamp_ns": now_ns,
                 }
             )
             self.nodes[source]["connections"] += 1
@@ -115,12 +142,12 @@ class KnowledgeGraph:
         """یافتن الگوهای پنهان در گراف"""
         patterns = []
 
-        # الگوی 1: نودهای با ارتباط بالا (هاب‌ها)
-        hubs = sorted(
-            [(nid, n["connections"]) for nid, n in self.nodes.items()],
+        # الگوی 1: نودهای با ارتباط بالا (هاب‌ها) - top-k با heap به جای مرتب‌سازی کامل
+        hubs = heapq.nlargest(
+            10,
+            ((nid, n["connections"]) for nid, n in self.nodes.items()),
             key=lambda x: x[1],
-            reverse=True,
-        )[:10]
+        )
 
         if hubs:
             patterns.append(
@@ -132,7 +159,7 @@ class KnowledgeGraph:
             )
 
         # الگوی 2: مفاهیم پرتکرار
-        top_concepts = sorted(self.concepts.items(), key=lambda x: x[1], reverse=True)[:5]
+        top_concepts = heapq.nlargest(5, self.concepts.items(), key=lambda x: x[1])
 
         if top_concepts:
             patterns.append(
@@ -149,6 +176,8 @@ class KnowledgeGraph:
             "total_concepts": len(self.concepts),
             "avg_connections": sum(n["connections"] for n in self.nodes.values())
             / max(len(self.nodes), 1),
+            "created_at": _format_ts(self._epoch_ns),
+            "last_updated": _format_ts(self._last_update_ns),
         }
 
 
@@ -177,6 +206,9 @@ class APIConnector:
             "quotes": "https://api.quotable.io/random",
             "books": "https://openlibrary.org/search.json",
         }
+        self.rate_limiters = {
+            source: TokenBucket(*limits) for source, limits in SOURCE_RATE_LIMITS.items()
+        }
 
     async def initialize(self):
         """راه‌اندازی session"""
@@ -192,6 +224,7 @@ class APIConnector:
         """دریافت اطلاعات از ویکی‌پدیا"""
         try:
             url = f"{self.api_endpoints['wikipedia']}{topic}"
+            await self.rate_limiters["wikipedia"].acquire()
             async with self.session.get(url) as response:
                 if response.status == 200:
                     return await response.json()
@@ -205,6 +238,7 @@ class APIConnector:
             url = (
                 f"{self.api_endpoints['arxiv']}?search_query=all:{query}&max_results={max_results}"
             )
+            await self.rate_limiters["arxiv"].acquire()
             async with self.session.get(url) as response:
                 if response.status == 200:
                     # پردازش XML response
@@ -323,27 +357,31 @@ class AutonomousAI:
 
         learned_data = {"topics": topics, "sources": [], "insights": []}
 
-        for topic in topics:
-            # دریافت از ویکی‌پدیا
-            wiki_data = await self.api_connector.fetch_wikipedia(topic)
-            if wiki_data:
-                node_id = hashlib.sha256(f"wiki_{topic}".encode()).hexdigest()[:16]
-                self.knowledge_graph.add_node(node_id, wiki_data, topic)
-                learned_data["sources"].append({"type": "wikipedia", "topic": topic})
-                self.stats["knowledge_nodes_created"] += 1
+        # همه درخواست‌های ویکی‌پدیا و arXiv به صورت همزمان (محدود به LEARNING_CONCURRENCY؛
+        # نرخ هر منبع را TokenBucket های APIConnector کنترل می‌کنند)
+        semaphore = asyncio.Semaphore(LEARNING_CONCURRENCY)
 
-            # دریافت از arXiv
-            arxiv_data = await self.api_connector.fetch_arxiv(topic)
-            if arxiv_data:
-                node_id = hashlib.sha256(f"arxiv_{topic}".encode()).hexdigest()[:16]
-                self.knowledge_graph.add_node(node_id, {"papers": arxiv_data}, topic)
-                learned_data["sources"].append({"type": "arxiv", "topic": topic})
-                self.stats["knowledge_nodes_created"] += 1
+        async def fetch(coro):
+            async with semaphore:
+                return await coro
 
-            self.stats["total_api_calls"] += 2
+        requests = []
+        for topic in topics:
+            requests.append(("wikipedia", "wiki", topic, self.api_connector.fetch_wikipedia(topic)))
+            requests.append(("arxiv", "arxiv", topic, self.api_connector.fetch_arxiv(topic)))
+        results = await asyncio.gather(
+            *(fetch(coro) for *_, coro in requests), return_exceptions=True
+        )
+        self.stats["total_api_calls"] += len(requests)
 
-            # تاخیر برای جلوگیری از rate limiting
-            await asyncio.sleep(0.5)
+        for (source, prefix, topic, _), data in zip(requests, results):
+            if not data or isinstance(data, BaseException):
+                continue
+            node_id = _short_id(prefix, topic)
+            node_data = data if source == "wikipedia" else {"papers": data}
+            if await self.knowledge_graph.add_node(node_id, node_data, topic):
+                learned_data["sources"].append({"type": source, "topic": topic})
+                self.stats["knowledge_nodes_created"] += 1
 
         # کشف الگوها
         patterns = self.knowledge_graph.find_patterns()
@@ -373,9 +411,9 @@ class AutonomousAI:
         nasa_data = await self.api_connector.fetch_nasa_apod()
         if nasa_data:
             patterns["cosmic_data"].append(nasa_data)
-            node_id = hashlib.sha256(f"nasa_{datetime.now()}".encode()).hexdigest()[:16]
-            self.knowledge_graph.add_node(node_id, nasa_data, "astronomy")
-            self.stats["knowledge_nodes_created"] += 1
+            node_id = _short_id("nasa", time.time_ns())
+            if await self.knowledge_graph.add_node(node_id, nasa_data, "astronomy"):
+                self.stats["knowledge_nodes_created"] += 1
 
         # دریافت داده‌های زلزله (علوم زمین)
         earthquake_data = await self.api_connector.fetch_earthquake_data()
@@ -383,9 +421,9 @@ class AutonomousAI:
             patterns["cosmic_data"].append(
                 {"type": "earthquake", "count": len(earthquake_data.get("features", []))}
             )
-            node_id = hashlib.sha256(f"earthquake_{datetime.now()}".encode()).hexdigest()[:16]
-            self.knowledge_graph.add_node(node_id, earthquake_data, "earth_science")
-            self.stats["knowledge_nodes_created"] += 1
+            node_id = _short_id("earthquake", time.time_ns())
+            if await self.knowledge_graph.add_node(node_id, earthquake_data, "earth_science"):
+                self.stats["knowledge_nodes_created"] += 1
 
         self.stats["total_api_calls"] += 2
 
@@ -17,6 +17,9 @@ PROJECT_ROOT = Path(__file__).resolve().parent.parent
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+# Keep the LLM response cache in memory so tests never write to the home directory
+os.environ["LANIAKEA_LLM_CACHE_PATH"] = ""
+
 
 @pytest.fixture(scope="session")
 def event_loop():
@@ -0,0 +1,32 @@
+"""
+Unit tests for the LLM response cache.
+"""
+
+import numpy as np
+
+from laniakea.intelligence.ai_api import _ResponseCache
+
+
+def test_response_cache_exact_semantic_and_persistent_tiers(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite")
+    cache = _ResponseCache(maxsize=2, path=path, threshold=0.95)
+    context, key = _ResponseCache.make_key("m", "sys", "what is a blockchain?", 0.0, 256)
+    assert cache.get(key) is None
+
+    cache.put(key, "a ledger", context, np.array([1.0, 0.0, 0.0]))
+    assert cache.get(key) == "a ledger"
+    assert cache.get_similar(context, np.array([0.99, 0.05, 0.0])) == "a ledger"
+    assert cache.get_similar(context, np.array([0.0, 1.0, 0.0])) is None
+    other_context, _ = _ResponseCache.make_key("m", "other", "what is a blockchain?", 0.0, 256)
+    assert cache.get_similar(other_context, np.array([1.0, 0.0, 0.0])) is None
+
+    # LRU eviction also drops the evicted entry's embedding and persisted row
+    cache.put("k2", "two")
+    cache.put("k3", "three")
+    assert cache.get(key) is None
+    assert cache.get_similar(context, np.array([1.0, 0.0, 0.0])) is None
+
+    reloaded = _ResponseCache(maxsize=2, path=path)
+    assert reloaded.get("k2") == "two"
+    assert reloaded.get("k3") == "three"
+    assert reloaded.get(key) is None
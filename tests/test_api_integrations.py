@@ -0,0 +1,341 @@
+"""
+Unit tests for the external API client helpers.
+"""
+
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+
+import pytest
+
+from laniakea.external_apis import api_integrations
+from laniakea.external_apis.api_integrations import (
+    API_CACHE,
+    MAX_CONCURRENT_REQUESTS,
+    APIManager,
+    APIProvider,
+    AsyncTTLCache,
+    NASAClient,
+    TokenBucket,
+    cache_result,
+    request_cache_scope,
+)
+
+
+@pytest.mark.asyncio
+async def test_ttl_cache_collapses_concurrent_fetches():
+    cache = AsyncTTLCache(maxsize=2)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"value": calls}
+
+    results = await asyncio.gather(*(cache.get_or_fetch("k", 60, fetch) for _ in range(5)))
+    assert calls == 1
+    assert results == [{"value": 1}] * 5
+
+    # hit from cache, then LRU eviction once maxsize is exceeded
+    assert await cache.get_or_fetch("k", 60, fetch) == {"value": 1}
+    cache.set("a", {"v": 1}, 60)
+    cache.set("b", {"v": 2}, 60)
+    assert len(cache) == 2
+    assert await cache.get_or_fetch("k", 60, fetch) == {"value": 2}
+
+
+@pytest.mark.asyncio
+async def test_cache_result_keys_positional_and_keyword_calls_alike():
+    class Client:
+        calls = 0
+
+        @cache_result("test_spec")
+        async def lookup(self, city=None, units="metric"):
+            Client.calls += 1
+            return {"city": city, "units": units}
+
+    API_CACHE.clear()
+    client = Client()
+    assert await client.lookup("Tehran") == {"city": "Tehran", "units": "metric"}
+    assert await client.lookup(city="Tehran") == {"city": "Tehran", "units": "metric"}
+    assert await client.lookup("Tehran", units="imperial") == {
+        "city": "Tehran",
+        "units": "imperial",
+    }
+    assert Client.calls == 2
+    assert Client.lookup.__name__ == "lookup"
+
+
+@pytest.fixture
+def disk_cache(tmp_path, monkeypatch):
+    pytest.importorskip("diskcache")
+    monkeypatch.setenv("LANIAKEA_API_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(api_integrations, "_disk_cache", None)
+    API_CACHE.clear()
+    disk = api_integrations._get_disk_cache()
+    yield disk
+    disk.close()
+    API_CACHE.clear()
+
+
+class _PersistedClient:
+    def __init__(self):
+        self.calls = 0
+
+    @cache_result("test_persist", ttl_seconds=60, persist=True)
+    async def lookup(self, name):
+        self.calls += 1
+        return {"name": name, "call": self.calls}
+
+
+@pytest.mark.asyncio
+async def test_persisted_cache_serves_memory_then_promotes_from_disk(disk_cache):
+    client = _PersistedClient()
+    assert await client.lookup("sol") == {"name": "sol", "call": 1}
+    assert await client.lookup("sol") == {"name": "sol", "call": 1}  # memory hit
+    assert disk_cache.get("test_persist:lookup:sol")[1] == {"name": "sol", "call": 1}
+
+    # a fresh process: memory is empty, the disk entry is promoted back into it
+    API_CACHE.clear()
+    assert await client.lookup("sol") == {"name": "sol", "call": 1}
+    assert API_CACHE.get("test_persist:lookup:sol") == {"name": "sol", "call": 1}
+    assert client.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_persisted_cache_serves_stale_entry_and_revalidates(disk_cache):
+    client = _PersistedClient()
+    disk_cache.set("test_persist:lookup:sol", (time.time() - 1, {"name": "sol", "call": 0}))
+
+    assert await client.lookup("sol") == {"name": "sol", "call": 0}  # stale, served at once
+    await asyncio.gather(*api_integrations._revalidating)
+    assert client.calls == 1
+    assert disk_cache.get("test_persist:lookup:sol")[1] == {"name": "sol", "call": 1}
+    assert await client.lookup("sol") == {"name": "sol", "call": 1}
+
+
+@pytest.mark.asyncio
+async def test_neo_range_splits_into_week_windows_and_merges_partial_errors(monkeypatch):
+    client = NASAClient(api_key="test")
+    windows = []
+
+    async def feed(start_date, end_date):
+        windows.append((start_date, end_date))
+        if start_date == "2024-01-08":
+            return {"error": "rate limited"}
+        if start_date == "2024-01-15":
+            raise asyncio.CancelledError()
+        return {"element_count": 2, "near_earth_objects": {start_date: [1, 2]}}
+
+    monkeypatch.setattr(client, "get_near_earth_objects", feed)
+    result = await client.get_near_earth_objects_range("2024-01-01", "2024-01-20")
+
+    assert windows == [
+        ("2024-01-01", "2024-01-07"),
+        ("2024-01-08", "2024-01-14"),
+        ("2024-01-15", "2024-01-20"),
+    ]
+    assert result["element_count"] == 2
+    assert result["near_earth_objects"] == {"2024-01-01": [1, 2]}
+    assert [e["start_date"] for e in result["partial_errors"]] == ["2024-01-08", "2024-01-15"]
+    assert result["partial_errors"][1]["error"] == "CancelledError"
+
+
+@pytest.mark.asyncio
+async def test_mars_rover_range_merges_photos_and_reports_failed_sols(monkeypatch):
+    client = NASAClient(api_key="test")
+
+    async def photos(rover, sol, camera):
+        if sol == 2:
+            raise asyncio.CancelledError()
+        return {"photos": [{"sol": sol}]}
+
+    monkeypatch.setattr(client, "get_mars_rover_photos", photos)
+    result = await client.get_mars_rover_photos_range("curiosity", [1, 2, 3])
+
+    assert result["photos"] == [{"sol": 1}, {"sol": 3}]
+    assert result["partial_errors"] == {2: "CancelledError"}
+
+
+@pytest.mark.asyncio
+async def test_query_batch_keeps_order_and_reports_failures():
+    manager = APIManager()
+
+    async def ok(**params):
+        return {"ok": params}
+
+    async def cancelled(**params):
+        raise asyncio.CancelledError()
+
+    manager._dispatch[(APIProvider.NASA, "get_apod")] = ok
+    manager._dispatch[(APIProvider.NASA, "get_near_earth_objects")] = cancelled
+
+    results = await manager.query_batch(
+        [
+            (APIProvider.NASA, "get_near_earth_objects", None),
+            (APIProvider.NASA, "missing", None),
+            (APIProvider.NASA, "get_apod", {"date": "2024-01-01"}),
+        ]
+    )
+
+    assert results[0] == {"error": "CancelledError"}
+    assert results[1] == {"error": "Unknown endpoint: nasa/missing"}
+    assert results[2] == {"ok": {"date": "2024-01-01"}}
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_allows_burst_then_waits_for_refill():
+    bucket = TokenBucket(capacity=2, refill_per_sec=20)
+
+    start = time.monotonic()
+    await bucket.acquire()
+    async with bucket:
+        pass
+    assert time.monotonic() - start < 0.03
+
+    await bucket.acquire()
+    assert time.monotonic() - start >= 0.04
+
+
+class _FakeResponse:
+    def __init__(self, status, body=b"{}", headers=None):
+        self.status = status
+        self.headers = headers or {}
+        self._body = body
+
+    async def read(self):
+        return self._body
+
+    async def text(self):
+        return self._body.decode()
+
+
+class _FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    @asynccontextmanager
+    async def get(self, url, params=None):
+        self.calls += 1
+        yield self.responses.pop(0)
+
+
+def test_retry_after_parses_seconds_and_http_dates():
+    assert api_integrations._retry_after("3") == 3.0
+    assert api_integrations._retry_after("-5") == 0.0
+    assert api_integrations._retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert api_integrations._retry_after("soon") is None
+    assert api_integrations._retry_after(None) is None
+
+
+def test_backoff_is_capped_with_jitter():
+    for attempt in range(10):
+        delay = api_integrations._backoff(attempt)
+        base = min(
+            api_integrations.RETRY_MAX_DELAY, api_integrations.RETRY_BASE_DELAY * 2**attempt
+        )
+        assert 0.5 * base <= delay <= 1.5 * base
+
+
+@pytest.mark.asyncio
+async def test_fetch_with_retry_honours_retry_after(monkeypatch):
+    delays = []
+
+    async def no_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(api_integrations.asyncio, "sleep", no_sleep)
+    session = _FakeSession(
+        [
+            _FakeResponse(429, headers={"Retry-After": "2"}),
+            _FakeResponse(503),
+            _FakeResponse(200, b'{"ok": true}'),
+        ]
+    )
+
+    assert await api_integrations.fetch_with_retry(session, "http://api.test") == {"ok": True}
+    assert session.calls == 3
+    assert delays[0] == 2.0
+    assert len(delays) == 2
+
+    # Retry-After beyond the cap gives up immediately
+    session = _FakeSession([_FakeResponse(429, headers={"Retry-After": "3600"})])
+    result = await api_integrations.fetch_with_retry(session, "http://api.test")
+    assert result["retry_after"] == 3600.0
+    assert session.calls == 1
+
+    # non-retryable statuses are returned as errors straight away
+    session = _FakeSession([_FakeResponse(404, b"missing")])
+    result = await api_integrations.fetch_with_retry(session, "http://api.test")
+    assert result == {"error": "Status 404", "detail": "missing"}
+
+
+@pytest.mark.asyncio
+async def test_request_cache_scope_pins_values_for_the_request():
+    cache = AsyncTTLCache()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        return {"value": calls}
+
+    async def failing():
+        return {"error": "boom"}
+
+    with request_cache_scope():
+        assert await cache.get_or_fetch("k", 60, fetch) == {"value": 1}
+        cache.clear()
+        # the global entry is gone but the request keeps seeing the same value
+        assert await cache.get_or_fetch("k", 60, fetch) == {"value": 1}
+        assert calls == 1
+
+        # errors are not pinned, so a retry inside the request can succeed
+        assert await cache.get_or_fetch("e", 60, failing) == {"error": "boom"}
+        cache.clear()
+        assert await cache.get_or_fetch("e", 60, fetch) == {"value": 2}
+
+    cache.clear()
+    assert await cache.get_or_fetch("k", 60, fetch) == {"value": 3}
+
+
+def test_api_manager_primitives_survive_a_new_event_loop():
+    manager = APIManager()
+    client = manager.nasa_client
+    client.rate_limiter = TokenBucket(capacity=1, refill_per_sec=1000)
+
+    async def contend():
+        # contention makes the lock and semaphore bind to the running loop
+        async def one():
+            async with client._limit():
+                await asyncio.sleep(0)
+
+        await asyncio.gather(*(one() for _ in range(MAX_CONCURRENT_REQUESTS + 5)))
+
+    asyncio.run(contend())
+    asyncio.run(contend())
+
+
+@pytest.mark.asyncio
+async def test_stock_series_arrays_become_lists_through_query_api(monkeypatch):
+    API_CACHE.clear()
+    manager = APIManager()
+    client = manager.financial_client
+    client.api_key = "test"
+    row = {"1. open": "1", "2. high": "2", "3. low": "0.5", "4. close": "1.5", "5. volume": "10"}
+
+    async def fake_get(url, params=None):
+        return {"Time Series (Daily)": {"2024-01-03": row, "2024-01-02": row}}
+
+    monkeypatch.setattr(client, "_get", fake_get)
+
+    direct = await client.get_stock_series("ACME")
+    assert direct["ohlcv"].shape == (2, 5)
+
+    result = await manager.query_api(APIProvider.FINANCIAL, "get_stock_series", {"symbol": "ACME"})
+    assert result["dates"] == ["2024-01-02", "2024-01-03"]
+    assert result["ohlcv"][0] == [1.0, 2.0, 0.5, 1.5, 10.0]
+    json.dumps(result)
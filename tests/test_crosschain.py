@@ -0,0 +1,25 @@
+"""
+Unit tests for the cross-chain bridge manager.
+"""
+
+import asyncio
+
+from laniakea.crosschain.cross_chain_manager import ChainType, CrossChainManager
+
+
+def test_total_liquidity_tracks_the_sum_of_all_pools():
+    manager = CrossChainManager()
+    chains = list(ChainType)[:3]
+
+    for from_chain in chains:
+        for to_chain in chains:
+            if from_chain is not to_chain:
+                manager.set_pool_fee_rate(from_chain, to_chain, 0.002)
+    asyncio.run(manager.get_liquidity_info(chains[0], chains[1], "0xtoken"))
+    # an existing pool is reused, not counted twice
+    manager.set_pool_fee_rate(chains[0], chains[1], 0.003)
+
+    assert len(manager.liquidity_pools) == 7
+    assert manager.get_bridge_statistics()["total_liquidity"] == sum(
+        pool["total_liquidity"] for pool in manager.liquidity_pools.values()
+    )
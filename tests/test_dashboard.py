@@ -0,0 +1,199 @@
+"""
+Unit tests for the dashboard metrics storage.
+"""
+
+import asyncio
+import concurrent.futures
+import gzip
+import json
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+from laniakea.dashboard.advanced_dashboard import (
+    AdvancedDashboard,
+    AIMetrics,
+    MetricRingBuffer,
+    SystemMetrics,
+)
+from laniakea.dashboard.live_dashboard import MetricsCollector
+
+
+def _system_row(ts: float, cpu: float) -> SystemMetrics:
+    return SystemMetrics(
+        timestamp=ts,
+        cpu_percent=cpu,
+        memory_percent=50.0,
+        disk_percent=10.0,
+        network_sent=1,
+        network_recv=2,
+        active_connections=3,
+    )
+
+
+def test_ring_buffer_wraps_in_chronological_order():
+    ring = MetricRingBuffer(SystemMetrics, capacity=3)
+    for i in range(5):
+        ring.append(_system_row(float(i), float(i * 10)))
+
+    assert len(ring) == 3
+    assert ring.column("timestamp").tolist() == [2.0, 3.0, 4.0]
+    assert ring.latest().cpu_percent == 40.0
+
+
+def test_ring_buffer_since_filters_by_timestamp():
+    ring = MetricRingBuffer(SystemMetrics, capacity=10)
+    now = time.time()
+    ring.append(_system_row(now - 100, 1.0))
+    ring.append(_system_row(now, 2.0))
+
+    rows = ring.since(now - 10)
+    assert [r["cpu_percent"] for r in rows] == [2.0]
+    assert rows[0]["active_connections"] == 3
+
+
+def test_ring_buffer_keeps_non_numeric_fields():
+    ring = MetricRingBuffer(AIMetrics, capacity=2)
+    assert ring.latest() is None
+
+    ring.append(AIMetrics(1.0, 10, 5, 1, 2, 0, None))
+    ring.append(AIMetrics(2.0, 11, 6, 1, 2, 0, "2025-01-01T00:00:00"))
+
+    assert ring.latest().last_evolution == "2025-01-01T00:00:00"
+    assert ring.records()[0]["last_evolution"] is None
+
+
+def test_summary_counters_track_alert_and_node_transitions():
+    dashboard = AdvancedDashboard()
+    dashboard._add_alert("HIGH_CPU", "cpu", "warning")
+    dashboard._add_alert("HIGH_CPU", "cpu again", "warning")
+    dashboard._add_alert("HIGH_DISK", "disk", "critical")
+    first_id = dashboard.alerts[0]["id"]
+    assert dashboard.acknowledge_alert(first_id)
+    assert not dashboard.acknowledge_alert(-1)
+
+    dashboard.register_node("n1", {})
+    dashboard.register_node("n2", {})
+    dashboard.update_node("n2", {"status": "inactive"})
+    dashboard.remove_node("n1")
+
+    summary = dashboard.get_summary()
+    assert summary["alerts"]["total"] == 2
+    assert summary["alerts"]["unacknowledged"] == 1
+    assert summary["alerts"]["by_severity"] == {"critical": 1}
+    assert summary["nodes"] == {"total": 1, "active": 0, "inactive": 1}
+
+
+def test_alerts_and_nodes_keep_wall_clock_keys():
+    dashboard = AdvancedDashboard()
+    before = time.time()
+    dashboard._add_alert("HIGH_CPU", "cpu", "warning")
+    dashboard.register_node("n1", {})
+    dashboard.update_node("n1", {"status": "active"})
+    alert = dashboard.alerts[0]
+    dashboard.acknowledge_alert(alert["id"])
+    after = time.time()
+
+    node = dashboard.nodes["n1"]
+    for value in (
+        alert["timestamp"],
+        alert["acknowledged_at"],
+        node["registered_at"],
+        node["last_seen"],
+    ):
+        assert before - 1 <= value <= after + 1
+    assert alert["datetime"] == datetime.fromtimestamp(alert["timestamp"]).isoformat()
+    assert dashboard.recent_events[0].to_dict()["timestamp"] == pytest.approx(
+        node["registered_at"], abs=1
+    )
+
+
+def test_metrics_collector_columnar_ring_keeps_sparse_fields():
+    collector = MetricsCollector(max_history=3)
+    collector.record("network", {"tps": 1, "region": "eu"})
+    for tps in (2.5, 3, 4):
+        collector.record("network", {"tps": tps})
+    collector.record("unknown", {"tps": 1})
+
+    recent = collector.get_recent("network")
+    assert [m["tps"] for m in recent] == [2.5, 3.0, 4.0]
+    assert all("region" not in m for m in recent)
+    assert collector.get_recent("network", 1)[0]["ts_ns"] >= recent[0]["ts_ns"]
+    assert recent[0]["timestamp"] == datetime.fromtimestamp(recent[0]["ts_ns"] / 1e9).isoformat()
+    assert collector.get_recent("unknown") == []
+    assert collector.get_summary()["network"]["count"] == 3
+
+
+def test_int_values_are_written_into_a_float_column_without_widening():
+    collector = MetricsCollector(max_history=4)
+    collector.record("network", {"tps": 0})
+    collector.record("network", {"tps": 2.5})
+    column = collector.metrics["network"].columns["tps"]
+
+    collector.record("network", {"tps": 3})
+    assert collector.metrics["network"].columns["tps"] is column
+    assert [m["tps"] for m in collector.get_recent("network")] == [0.0, 2.5, 3.0]
+
+
+def test_metrics_collector_restores_history_from_ring_files(tmp_path):
+    collector = MetricsCollector(max_history=2, persist_dir=str(tmp_path))
+    for height in (1, 2, 3):
+        collector.record("blockchain", {"chain_length": height, "label": "x"})
+    collector.close()
+
+    restored = MetricsCollector(max_history=2, persist_dir=str(tmp_path))
+    try:
+        assert [m["chain_length"] for m in restored.get_recent("blockchain")] == [2.0, 3.0]
+        assert "label" not in restored.get_recent("blockchain")[0]
+    finally:
+        restored.close()
+
+
+def test_metrics_collector_delta_returns_only_newer_records():
+    collector = MetricsCollector(max_history=3)
+    for tps in range(5):
+        collector.record("network", {"tps": tps})
+    last_seen = collector.get_recent("network", 2)[0]["ts_ns"]
+
+    delta = json.loads(gzip.decompress(collector.delta("network", last_seen)))
+    assert delta["tps"] == [4]
+    assert json.loads(collector.delta("network", compress=False))["tps"] == [2, 3, 4]
+
+
+def test_export_metrics_is_sync_with_an_async_variant(tmp_path):
+    dashboard = AdvancedDashboard()
+    dashboard.register_node("n1", {})
+    dashboard._add_alert("HIGH_CPU", "cpu", "warning")
+
+    path = tmp_path / "sync.json"
+    assert dashboard.export_metrics(str(path)) is None
+    data = json.loads(path.read_text())
+    assert data["nodes"]["n1"]["status"] == "active"
+    assert data["alerts"][0]["type"] == "HIGH_CPU"
+
+    async_path = tmp_path / "async.json"
+    asyncio.run(dashboard.export_metrics_async(str(async_path)))
+    assert json.loads(async_path.read_text())["nodes"] == data["nodes"]
+
+
+def test_stop_waits_for_the_running_snapshot_before_closing_sockstat():
+    dashboard = AdvancedDashboard()
+    dashboard._sockstat_fd = fd = os.open(os.devnull, os.O_RDONLY)
+    dashboard._exec = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+    def snapshot():
+        time.sleep(0.05)
+        return os.fstat(fd)
+
+    async def run():
+        future = dashboard._exec.submit(snapshot)
+        await dashboard.stop()
+        return future
+
+    future = asyncio.run(run())
+    assert future.result()  # the read finished on a still-open descriptor
+    assert dashboard._sockstat_fd is None
+    with pytest.raises(OSError):
+        os.fstat(fd)
@@ -0,0 +1,44 @@
+"""
+Unit tests for the metaverse diplomacy system.
+"""
+
+import time
+
+from laniakea.governance.metaverse_diplomacy import DiplomacySystem
+
+
+def test_treaties_are_indexed_by_party_and_expire_against_one_clock_read():
+    diplomacy = DiplomacySystem()
+    active = diplomacy.create_treaty(
+        ["a", "b"], "Knowledge_Sharing", "share", "2999-01-01T00:00:00+00:00"
+    )
+    expired = diplomacy.create_treaty(
+        ["a", "c"], "Defense_Pact", "defend", "2000-01-01T00:00:00+00:00"
+    )
+    open_ended = diplomacy.create_treaty(["a", "d"], "Defense_Pact", "defend")
+    diplomacy.create_treaty(["b", "c"], "Defense_Pact", "unrelated")
+
+    assert list(diplomacy.treaties_by_party["a"].values()) == [active, expired, open_ended]
+
+    now = time.time()
+    assert not active.is_expired(now)
+    assert expired.is_expired(now)
+    assert not open_ended.is_expired(now)
+    assert expired.to_dict(now)["expired"] is True
+    assert active.to_dict(now)["expired"] is False
+
+
+def test_purge_expired_marks_due_treaties_once():
+    diplomacy = DiplomacySystem()
+    due = diplomacy.create_treaty(
+        ["a", "b"], "Knowledge_Sharing", "share", "2000-01-01T00:00:00+00:00"
+    )
+    later = diplomacy.create_treaty(
+        ["a", "c"], "Defense_Pact", "defend", "2999-01-01T00:00:00+00:00"
+    )
+    diplomacy.create_treaty(["a", "d"], "Defense_Pact", "defend")
+
+    assert diplomacy.purge_expired() == 1
+    assert diplomacy.purge_expired() == 0
+    assert due.status == "expired"
+    assert later.status == "active"
@@ -0,0 +1,79 @@
+"""
+Unit tests for the v2 governance DAO.
+"""
+
+import pytest
+
+from laniakea.governance.dao_v2 import (
+    GovernanceConfig,
+    GovernanceDAO,
+    ProposalAction,
+    ProposalState,
+)
+
+
+def _voting_dao() -> GovernanceDAO:
+    dao = GovernanceDAO(config=GovernanceConfig(voting_period_seconds=0, voting_delay_seconds=0))
+    dao.register_voter("alice", 500)
+    dao.register_voter("bob", 200)
+    return dao
+
+
+def test_running_tally_and_state_index_follow_votes():
+    dao = _voting_dao()
+    p = dao.create_proposal("t", "d", "alice")
+    other = dao.create_proposal("t2", "d2", "alice")
+    dao.submit(p.proposal_id)
+    dao.start_voting(p.proposal_id)
+
+    dao.vote(p.proposal_id, "alice", "for")
+    dao.vote(p.proposal_id, "bob", "against")
+    dao.vote(p.proposal_id, "bob", "abstain")  # re-vote replaces the earlier one
+    assert p.tally() == {"for": 500, "against": 0, "abstain": 200, "total": 700}
+
+    assert dao.list_proposals(ProposalState.VOTING) == [p]
+    assert dao.list_proposals(ProposalState.DRAFT) == [other]
+    assert dao.state_counts() == {"DRAFT": 1, "VOTING": 1}
+
+
+def test_revote_replaces_in_place():
+    dao = _voting_dao()
+    p = dao.create_proposal("t", "d", "alice")
+    dao.submit(p.proposal_id)
+    dao.start_voting(p.proposal_id)
+
+    dao.vote(p.proposal_id, "alice", "against")
+    dao.vote(p.proposal_id, "bob", "for")
+    dao.vote(p.proposal_id, "alice", "for")
+    assert [(v.voter, v.choice) for v in p.votes] == [("alice", "for"), ("bob", "for")]
+    assert p.has_voted("bob") and not p.has_voted("carol")
+    assert p.tally()["against"] == 0
+
+
+def test_snapshot_reflects_replaced_votes():
+    dao = _voting_dao()
+    p = dao.create_proposal("t", "d", "alice")
+    dao.submit(p.proposal_id)
+    dao.start_voting(p.proposal_id)
+    dao.vote(p.proposal_id, "alice", "against")
+    dao.vote(p.proposal_id, "alice", "for")
+
+    snap = p.snapshot()
+    assert [v["choice"] for v in snap["votes"]] == ["for"]
+    assert snap["tally"]["for"] == 500
+
+
+def test_action_payloads_are_parsed_at_creation():
+    dao = _voting_dao()
+    p = dao.create_proposal(
+        "spend",
+        "d",
+        "alice",
+        actions=[ProposalAction("treasury_spend", {"to": "bob", "amount": "25"})],
+    )
+    assert p.actions[0].params.amount == 25
+
+    with pytest.raises(ValueError, match="invalid_payload:treasury_spend"):
+        dao.create_proposal(
+            "bad", "d", "alice", actions=[ProposalAction("treasury_spend", {"amount": "lots"})]
+        )
@@ -0,0 +1,67 @@
+"""
+Unit tests for the DID identity and reputation systems.
+"""
+
+import pytest
+
+from laniakea.identity.did_system import IdentityManager, ReputationSystem
+
+
+def test_leaderboard_follows_reputation_updates():
+    manager = IdentityManager()
+    reputation = ReputationSystem(manager)
+    for node in ("a", "b", "c"):
+        manager.create_identity(node, "pem")
+
+    reputation.record_activity("did:laniakea:b", "mining", 40.0)
+    reputation.record_activity("did:laniakea:c", "mining", 10.0)
+    assert [did for did, _ in reputation.get_leaderboard(2)] == ["did:laniakea:b", "did:laniakea:c"]
+
+    manager.set_reputation("did:laniakea:a", 99.0)
+    assert reputation.get_leaderboard(1) == [("did:laniakea:a", 99.0)]
+    assert len(reputation.get_leaderboard(10)) == 3
+
+
+def test_reputation_is_recomputed_on_read():
+    manager = IdentityManager()
+    reputation = ReputationSystem(manager)
+    doc = manager.create_identity("a", "pk")
+
+    other = manager.create_identity("b", "pk")
+
+    reputation.record_activity(doc.did, "mining", 40.0)
+    reputation.record_activity(doc.did, "mining", 20.0)
+    # direct reads through IdentityManager see the pending activity too
+    assert manager.search_identities(min_reputation=10) == [doc]
+    assert manager.calculate_trust_score(other.did, doc.did) == pytest.approx(0.3)
+    assert reputation.get_reputation(doc.did) == pytest.approx(30.0)
+
+
+def test_trust_path_cache_is_invalidated_when_identity_is_recreated():
+    manager = IdentityManager()
+    a = manager.create_identity("a", "pk")
+    b = manager.create_identity("b", "pk")
+    c = manager.create_identity("c", "pk")
+    manager.add_trust(a.did, b.did)
+    manager.add_trust(b.did, c.did)
+
+    assert manager.calculate_trust_score(a.did, b.did) == 0.9
+    assert manager.calculate_trust_score(a.did, c.did) == 0.7
+    assert set(a.trust_network) == {b.did}
+
+    # re-creating resets the trust edges, so the memoised path scores must go too
+    manager.create_identity("a", "pk")
+    assert manager.calculate_trust_score(a.did, b.did) == 0.0
+    assert manager.calculate_trust_score(a.did, c.did) == 0.0
+
+
+def test_trust_network_is_read_only():
+    manager = IdentityManager()
+    a = manager.create_identity("a", "pk")
+    b = manager.create_identity("b", "pk")
+    manager.add_trust(a.did, b.did)
+
+    assert b.did in a.trust_network
+    assert not hasattr(a.trust_network, "add")
+    with pytest.raises(AttributeError):
+        a.trust_network.discard(b.did)